@@ -3,11 +3,8 @@ Authentication Routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from api.dependencies import get_db, get_current_user
 from api.schemas.auth import (
@@ -19,7 +16,7 @@ from api.schemas.auth import (
 )
 from database.manager import DatabaseManager
 from models import Usuario
-from utils.security import verify_password, create_access_token
+from utils.security import hash_password, verify_password, create_access_token
 from datetime import timedelta
 from config import settings
 
@@ -55,8 +52,8 @@ async def login(
             detail="Incorrect username or password"
         )
 
-    # Verify password
-    if not verify_password(credentials.password, user.password_hash):
+    # Verify password (bcrypt in a worker thread, off the event loop)
+    if not await run_in_threadpool(verify_password, credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -118,11 +115,14 @@ async def register(
             detail="Email already registered"
         )
 
+    # Hash in a worker thread: bcrypt would block the event loop for ~100-300 ms
+    password_hash = await run_in_threadpool(hash_password, user_data.password)
+
     # Create user
     new_user = manager.crear_usuario(
         username=user_data.username,
         email=user_data.email,
-        password=user_data.password,
+        password_hash=password_hash,
         nombre_completo=user_data.nombre_completo
     )
 
@@ -164,12 +164,17 @@ async def update_current_user(
     """
     manager = DatabaseManager(db)
 
+    # Hash in a worker thread (see register)
+    password_hash = None
+    if user_update.password:
+        password_hash = await run_in_threadpool(hash_password, user_update.password)
+
     # Update user
     updated_user = manager.actualizar_usuario(
         current_user.id,
         email=user_update.email,
         nombre_completo=user_update.nombre_completo,
-        password=user_update.password
+        password_hash=password_hash
     )
 
     return UsuarioResponse.model_validate(updated_user)
@@ -3,21 +3,24 @@ Concepto Routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from contextlib import ExitStack
 from typing import List, Optional
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from api.dependencies import get_db, get_current_user, get_database_manager
 from api.schemas.concepto import (
     ConceptoCreate,
     ConceptoUpdate,
     ConceptoResponse,
+    ConceptoFila,
     ConceptoConUsos
 )
+from api.schemas.medicion import MedicionFila
+from database.connection import obtener_manager
 from database.manager import DatabaseManager
+from database.readonly import iter_conceptos_filas, listar_mediciones_filas
 from models import Usuario, TipoConcepto
 
 router = APIRouter()
@@ -51,7 +54,7 @@ def verificar_acceso_proyecto(proyecto_id: int, user_id: int, manager: DatabaseM
         )
 
 
-@router.get("", response_model=List[ConceptoResponse])
+@router.get("", response_model=List[ConceptoFila])
 async def listar_conceptos(
     proyecto_id: int,
     tipo: Optional[TipoConcepto] = None,
@@ -72,7 +75,7 @@ async def listar_conceptos(
         manager: Database manager
 
     Returns:
-        List of conceptos
+        List of conceptos (streamed as a JSON array)
 
     Raises:
         HTTPException: If project not found or user doesn't have access
@@ -80,10 +83,39 @@ async def listar_conceptos(
     # Verify access
     verificar_acceso_proyecto(proyecto_id, current_user.id, manager, current_user.es_admin)
 
-    # Get conceptos
-    conceptos = manager.listar_conceptos(proyecto_id, tipo=tipo, skip=skip, limit=limit)
-
-    return [ConceptoResponse.model_validate(c) for c in conceptos]
+    # Own session: the request-scoped one is closed before the body is streamed.
+    # It is opened here so the first row is read and validated before the 200
+    # status and the opening bracket are sent: a failure is still a clean 500.
+    pila = ExitStack()
+    try:
+        stream_manager = pila.enter_context(obtener_manager())
+        # Core rows: serialization only, no ORM objects needed
+        conceptos = iter_conceptos_filas(
+            stream_manager.session, proyecto_id, tipo=tipo, offset=skip, limite=limit
+        )
+        primero = next(conceptos, None)
+        primero_json = (
+            ConceptoFila.model_validate(primero).model_dump_json()
+            if primero is not None else None
+        )
+    except BaseException:
+        pila.close()
+        raise
+
+    def stream_conceptos():
+        with pila:
+            yield "["
+            if primero_json is not None:
+                yield primero_json
+                for concepto in conceptos:
+                    yield "," + ConceptoFila.model_validate(concepto).model_dump_json()
+            yield "]"
+
+    # The background task also closes the session if the stream never starts
+    # (ExitStack.close() is idempotent)
+    return StreamingResponse(
+        stream_conceptos(), media_type="application/json", background=BackgroundTask(pila.close)
+    )
 
 
 @router.post("", response_model=ConceptoResponse, status_code=status.HTTP_201_CREATED)
@@ -315,3 +347,40 @@ async def obtener_usos_concepto(
         num_usos=len(nodos_usando),
         nodos_ids=[n.id for n in nodos_usando]
     )
+
+
+@router.get("/{concepto_id}/mediciones", response_model=List[MedicionFila])
+async def listar_mediciones_concepto(
+    concepto_id: int,
+    current_user: Usuario = Depends(get_current_user),
+    manager: DatabaseManager = Depends(get_database_manager)
+):
+    """
+    List the mediciones of a concepto, ordered by 'orden'.
+
+    Args:
+        concepto_id: Concepto ID
+        current_user: Current authenticated user
+        manager: Database manager
+
+    Returns:
+        List of mediciones (subtotal computed by the database)
+
+    Raises:
+        HTTPException: If concepto not found or user doesn't have access
+    """
+    concepto = manager.obtener_concepto_por_id(concepto_id)
+
+    if not concepto:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Concepto not found"
+        )
+
+    # Verify access to project
+    verificar_acceso_proyecto(concepto.proyecto_id, current_user.id, manager, current_user.es_admin)
+
+    # Core rows: serialization only, no ORM objects needed
+    mediciones = listar_mediciones_filas(manager.session, concepto_id)
+
+    return [MedicionFila.model_validate(medicion) for medicion in mediciones]
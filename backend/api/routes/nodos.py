@@ -5,21 +5,19 @@ Nodo Routes
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from api.dependencies import get_db, get_current_user, get_database_manager
 from api.schemas.nodo import (
     NodoCreate,
     NodoUpdate,
     NodoResponse,
+    NodoFila,
     NodoCompleto,
     NodoMover,
     NodoConHijos
 )
 from database.manager import DatabaseManager
+from database.readonly import listar_hijos_filas
 from models import Usuario
 
 router = APIRouter()
@@ -87,14 +85,20 @@ async def crear_nodo(
         )
 
     # Create nodo
-    nodo = manager.crear_nodo(
-        proyecto_id=proyecto_id,
-        codigo_concepto=nodo_data.codigo_concepto,
-        padre_id=nodo_data.padre_id,
-        nivel=nodo_data.nivel,
-        orden=nodo_data.orden,
-        cantidad=nodo_data.cantidad
-    )
+    try:
+        nodo = manager.crear_nodo(
+            proyecto_id=proyecto_id,
+            codigo_concepto=nodo_data.codigo_concepto,
+            padre_id=nodo_data.padre_id,
+            nivel=nodo_data.nivel,
+            orden=nodo_data.orden,
+            cantidad=nodo_data.cantidad
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
     return NodoResponse.model_validate(nodo)
 
@@ -256,7 +260,7 @@ async def mover_nodo(
         )
 
 
-@router.get("/{nodo_id}/hijos", response_model=List[NodoResponse])
+@router.get("/{nodo_id}/hijos", response_model=List[NodoFila])
 async def listar_hijos_nodo(
     nodo_id: int,
     current_user: Usuario = Depends(get_current_user),
@@ -288,6 +292,6 @@ async def listar_hijos_nodo(
     verificar_acceso_proyecto(nodo.proyecto_id, current_user.id, manager, current_user.es_admin)
 
     # Get children
-    hijos = manager.listar_hijos_nodo(nodo_id)
+    hijos = listar_hijos_filas(manager.session, nodo_id)
 
-    return [NodoResponse.model_validate(hijo) for hijo in hijos]
+    return [NodoFila.model_validate(hijo) for hijo in hijos]
@@ -4,12 +4,8 @@ Procesamiento Routes - PDF upload and phase execution
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
-import sys
-from pathlib import Path
 import shutil
 
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
 from api.dependencies import get_db, get_current_user, get_database_manager
 from api.schemas.procesamiento import (
     PDFUploadResponse,
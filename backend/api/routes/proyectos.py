@@ -3,14 +3,16 @@ Proyecto Routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from contextlib import ExitStack
 from typing import List
-import sys
 from pathlib import Path
 import hashlib
 import shutil
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
+import tempfile
 
 from api.dependencies import get_db, get_current_user, get_database_manager
 from api.schemas.proyecto import (
@@ -21,15 +23,19 @@ from api.schemas.proyecto import (
     ProyectoArbol,
     EstadisticasProyecto
 )
+from database.connection import get_async_session, obtener_manager
 from database.manager import DatabaseManager
-from database.queries import QueryHelper
-from models import Usuario
+from database.queries import AsyncQueryHelper
+from models import Proyecto, Usuario
 from services.proyecto_service import ProyectoService
 from services.procesamiento_service import ProcesamientoService
 from config import settings
 
 router = APIRouter()
 
+# Chunk size for streaming uploads to disk
+_UPLOAD_CHUNK_SIZE = 1 << 16
+
 
 @router.get("", response_model=List[ProyectoResponse])
 async def listar_proyectos(
@@ -106,33 +112,45 @@ async def upload_pdf(
             detail="Only PDF files are allowed"
         )
 
-    # Read file content
-    file_content = await file.read()
-
-    # Validate file size
-    if len(file_content) > settings.MAX_UPLOAD_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds maximum allowed ({settings.MAX_UPLOAD_SIZE / 1024 / 1024} MB)"
-        )
-
-    # Calculate file hash
-    file_hash = hashlib.md5(file_content).hexdigest()
+    # Stream the upload to a temporary file, hashing and size-checking each
+    # chunk, so the whole PDF is never held in memory
+    file_hash = hashlib.md5()
+    file_size = 0
+    with tempfile.NamedTemporaryFile(dir=settings.UPLOADS_DIR, suffix='.part', delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+        try:
+            while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File size exceeds maximum allowed ({settings.MAX_UPLOAD_SIZE / 1024 / 1024} MB)"
+                    )
+                file_hash.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
 
     # Create project name from filename
     proyecto_nombre = file.filename.replace('.pdf', '')
 
-    # Create project first to get proyecto_id
-    proyecto = manager.crear_proyecto(
-        usuario_id=current_user.id,
-        nombre=proyecto_nombre,
-        descripcion=f"Proyecto creado desde PDF: {file.filename}"
-    )
+    # Until the temporary file is moved into place, any failure must remove it
+    try:
+        # Create project first to get proyecto_id
+        proyecto = manager.crear_proyecto(
+            usuario_id=current_user.id,
+            nombre=proyecto_nombre,
+            descripcion=f"Proyecto creado desde PDF: {file.filename}"
+        )
 
-    # Save file with proyecto_id instead of hash
-    file_path = settings.UPLOADS_DIR / f"u{current_user.id}_p{proyecto.id}_{file.filename}"
-    with open(file_path, 'wb') as f:
-        f.write(file_content)
+        # Save file with proyecto_id instead of hash
+        file_path = settings.UPLOADS_DIR / f"u{current_user.id}_p{proyecto.id}_{file.filename}"
+        tmp_path.replace(file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
     # Update project with PDF info
     from models import Proyecto
@@ -140,7 +158,7 @@ async def upload_pdf(
     if proyecto_obj:
         proyecto_obj.pdf_path = str(file_path)
         proyecto_obj.pdf_nombre = file.filename
-        proyecto_obj.pdf_hash = file_hash
+        proyecto_obj.pdf_hash = file_hash.hexdigest()
         manager.session.commit()
 
     # Return upload success without processing
@@ -215,15 +233,18 @@ async def obtener_proyecto(
 async def obtener_estadisticas_proyecto(
     proyecto_id: int,
     current_user: Usuario = Depends(get_current_user),
-    manager: DatabaseManager = Depends(get_database_manager)
+    async_db: AsyncSession = Depends(get_async_session)
 ):
     """
     Get project statistics.
 
+    Read-only: runs on the async (asyncpg) session so it does not block the
+    event loop.
+
     Args:
         proyecto_id: Project ID
         current_user: Current authenticated user
-        manager: Database manager
+        async_db: Async database session
 
     Returns:
         Project statistics (simplified for frontend)
@@ -231,7 +252,7 @@ async def obtener_estadisticas_proyecto(
     Raises:
         HTTPException: If project not found or user doesn't have access
     """
-    proyecto = manager.obtener_proyecto(proyecto_id)
+    proyecto = await async_db.get(Proyecto, proyecto_id)
 
     if not proyecto:
         raise HTTPException(
@@ -247,12 +268,14 @@ async def obtener_estadisticas_proyecto(
         )
 
     # Get statistics from database
-    query_helper = QueryHelper(manager.session)
-    estadisticas = query_helper.obtener_estadisticas_proyecto(proyecto_id)
+    query_helper = AsyncQueryHelper(async_db)
+    estadisticas = await query_helper.obtener_estadisticas_proyecto(
+        proyecto_id, version=proyecto.fecha_actualizacion
+    )
 
     # Contar mediciones
     from sqlalchemy import text
-    result = manager.session.execute(
+    result = await async_db.execute(
         text("SELECT COUNT(*) FROM appmediciones.mediciones WHERE concepto_id IN (SELECT id FROM appmediciones.conceptos WHERE proyecto_id = :pid)"),
         {"pid": proyecto_id}
     )
@@ -368,7 +391,8 @@ async def obtener_arbol_proyecto(
         db: Database session
 
     Returns:
-        Project with complete tree
+        Project with complete tree (streamed; nodes are written as they
+        are read from the database cursor)
 
     Raises:
         HTTPException: If project not found or user doesn't have access
@@ -389,13 +413,35 @@ async def obtener_arbol_proyecto(
             detail="Not authorized to access this project"
         )
 
-    # Get tree
-    query_helper = QueryHelper(db)
-    arbol = query_helper.obtener_arbol_completo(proyecto_id)
+    proyecto_json = ProyectoResponse.model_validate(proyecto).model_dump_json()
+
+    # Own session: the request-scoped one is closed before the body is streamed.
+    # It is opened here so the first block is read before the 200 status and
+    # the JSON prefix are sent: a pool or database failure is still a clean 500.
+    pila = ExitStack()
+    try:
+        stream_manager = pila.enter_context(obtener_manager())
+        # One chunk per server-side cursor block (up to 1000 rows);
+        # rows arrive already serialized to JSON by PostgreSQL
+        bloques = stream_manager.queries.bloques_arbol_json(proyecto_id)
+        primero = next(bloques, None)
+    except BaseException:
+        pila.close()
+        raise
 
-    return ProyectoArbol(
-        proyecto=ProyectoResponse.model_validate(proyecto),
-        arbol=arbol
+    def stream_arbol():
+        with pila:
+            yield '{"proyecto":' + proyecto_json + ',"arbol":['
+            if primero is not None:
+                yield ",".join(primero)
+                for bloque in bloques:
+                    yield "," + ",".join(bloque)
+            yield "]}"
+
+    # The background task also closes the session if the stream never starts
+    # (ExitStack.close() is idempotent)
+    return StreamingResponse(
+        stream_arbol(), media_type="application/json", background=BackgroundTask(pila.close)
     )
 
 
@@ -403,15 +449,18 @@ async def obtener_arbol_proyecto(
 async def obtener_estadisticas_proyecto(
     proyecto_id: int,
     current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    async_db: AsyncSession = Depends(get_async_session)
 ):
     """
     Get project statistics.
 
+    Read-only: runs on the async (asyncpg) session so it does not block the
+    event loop.
+
     Args:
         proyecto_id: Project ID
         current_user: Current authenticated user
-        db: Database session
+        async_db: Async database session
 
     Returns:
         Project statistics
@@ -419,8 +468,7 @@ async def obtener_estadisticas_proyecto(
     Raises:
         HTTPException: If project not found or user doesn't have access
     """
-    manager = DatabaseManager(db)
-    proyecto = manager.obtener_proyecto(proyecto_id)
+    proyecto = await async_db.get(Proyecto, proyecto_id)
 
     if not proyecto:
         raise HTTPException(
@@ -436,8 +484,10 @@ async def obtener_estadisticas_proyecto(
         )
 
     # Get statistics
-    query_helper = QueryHelper(db)
-    stats = query_helper.obtener_estadisticas_proyecto(proyecto_id)
+    query_helper = AsyncQueryHelper(async_db)
+    stats = await query_helper.obtener_estadisticas_proyecto(
+        proyecto_id, version=proyecto.fecha_actualizacion
+    )
 
     return EstadisticasProyecto(**stats)
 
@@ -51,6 +51,17 @@ class ConceptoResponse(ConceptoBase):
         from_attributes = True
 
 
+class ConceptoFila(ConceptoBase):
+    """Schema for a concepto row from the read-only listings (all table columns)"""
+    id: int
+    proyecto_id: int
+    total_calculado: Optional[Decimal] = None
+    tiene_mediciones: Optional[int] = None
+    mediciones_validadas: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class ConceptoConUsos(ConceptoResponse):
     """Schema for concepto with usage information"""
     num_usos: int
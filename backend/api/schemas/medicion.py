@@ -49,3 +49,17 @@ class MedicionResponse(MedicionBase):
 
     class Config:
         from_attributes = True
+
+
+class MedicionFila(BaseModel):
+    """Schema for a medicion row from the read-only listings (database.readonly)"""
+    id: int
+    concepto_id: int
+    comentario: Optional[str] = None
+    tipo: Optional[TipoMedicion] = None
+    unidades: Optional[Decimal] = None
+    largo: Optional[Decimal] = None
+    ancho: Optional[Decimal] = None
+    alto: Optional[Decimal] = None
+    subtotal: Optional[Decimal] = None
+    orden: int
@@ -39,6 +39,17 @@ class NodoResponse(NodoBase):
         from_attributes = True
 
 
+class NodoFila(BaseModel):
+    """Schema for a nodo row from the read-only listings (database.readonly)"""
+    id: int
+    proyecto_id: int
+    padre_id: Optional[int] = None
+    codigo_concepto: str
+    nivel: int
+    orden: int
+    cantidad: Optional[Decimal] = None
+
+
 class NodoCompleto(NodoResponse):
     """Schema for complete nodo with concepto data"""
     concepto_nombre: Optional[str] = None
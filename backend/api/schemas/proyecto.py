@@ -3,7 +3,7 @@ Pydantic schemas for Proyecto
 """
 
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
 
@@ -50,10 +50,33 @@ class ProyectoCompleto(ProyectoResponse):
     num_mediciones: int = 0
 
 
+class NodoArbolFila(BaseModel):
+    """Schema for one node of the flat project tree (preorder, by path)"""
+    nodo_id: int
+    proyecto_id: int
+    padre_id: Optional[int] = None
+    codigo_concepto: str
+    nivel: int
+    orden: int
+    cantidad: Optional[float] = None
+    path: str
+    tipo: Optional[str] = None
+    nombre: Optional[str] = None
+    resumen: Optional[str] = None
+    descripcion: Optional[str] = None
+    unidad: Optional[str] = None
+    precio: Optional[float] = None
+    total: Optional[float] = None
+    total_calculado: Optional[float] = None
+    cantidad_total: Optional[float] = None
+    importe_total: Optional[float] = None
+    importe: Optional[float] = None
+
+
 class ProyectoArbol(BaseModel):
     """Schema for proyecto tree structure"""
     proyecto: ProyectoResponse
-    arbol: List[Dict[str, Any]]
+    arbol: List[NodoArbolFila]
 
 
 class EstadisticasProyecto(BaseModel):
@@ -20,12 +20,20 @@ class Settings(BaseSettings):
     API_PORT: int = 8005
 
     # Base de datos
-    DATABASE_URL: str = "postgresql://imac@localhost:5432/appmediciones_db"
+    DATABASE_URL: str = "postgresql+psycopg://imac@localhost:5432/appmediciones_db"
+    DB_STATEMENT_TIMEOUT: str = "30s"  # Corta queries desbocadas (ej: CTE recursiva)
+    DB_IDLE_IN_TRANSACTION_TIMEOUT: str = "60s"  # Libera conexiones con transacción abandonada
+    # Pool síncrono: DB_POOL_SIZE + DB_POOL_SIZE de overflow; pool asíncrono: la
+    # mitad de cada uno. Máximo por proceso = 3 × DB_POOL_SIZE (30 con el valor
+    # por defecto); multiplicar por los workers de uvicorn y dejarlo por debajo
+    # del max_connections de PostgreSQL (100 por defecto)
+    DB_POOL_SIZE: int = 10
 
     # JWT
     JWT_SECRET: str = "dev-secret-key-change-in-production-12345"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 480  # 8 horas
+    BCRYPT_ROUNDS: int = 12  # Coste de bcrypt (cada +1 duplica el tiempo de hash)
 
     # CORS
     CORS_ORIGINS: list = [
@@ -45,6 +53,9 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50 MB
     MAX_FILE_PAGES: int = 500  # Máximo de páginas en PDF
 
+    # Extracción de PDF
+    PDF_MOTOR: str = "pdfplumber"  # pdfplumber | pymupdf (más rápido; ver parsers/pdf_extractor.py)
+
     # AI / LLM Services
     ANTHROPIC_API_KEY: str = ""
     OPENROUTER_API_KEY: str = ""
@@ -2,7 +2,7 @@
 Database package para APPmediciones
 """
 
-from .connection import engine, SessionLocal, get_db
+from .connection import engine, SessionLocal, get_db, get_async_session, obtener_manager
 from .manager import DatabaseManager
 
-__all__ = ['engine', 'SessionLocal', 'get_db', 'DatabaseManager']
+__all__ = ['engine', 'SessionLocal', 'get_db', 'get_async_session', 'obtener_manager', 'DatabaseManager']
@@ -2,27 +2,80 @@
 Conexión a base de datos PostgreSQL
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
-import sys
-from pathlib import Path
-
-# Añadir el directorio backend al path para imports
-sys.path.append(str(Path(__file__).parent.parent))
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from contextlib import contextmanager
+from typing import AsyncIterator, Generator, Iterator
 
 from config import settings
 from models.base import Base
+from .manager import DatabaseManager
+
+# Driver psycopg (v3): protocolo binario y sentencias preparadas en el servidor.
+# Las URLs "postgresql://" heredadas de .env se redirigen a este driver.
+database_url = make_url(settings.DATABASE_URL)
+if database_url.drivername == "postgresql":
+    database_url = database_url.set(drivername="postgresql+psycopg")
 
 # Crear engine
 engine = create_engine(
-    settings.DATABASE_URL,
+    database_url,
+    connect_args={
+        "prepare_threshold": 0,  # Preparar cada sentencia desde la primera ejecución
+        "options": "-c jit=off",  # El JIT no compensa en queries OLTP cortas
+    },
     pool_pre_ping=True,  # Verificar conexiones antes de usar
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,  # Conexiones persistentes reutilizadas entre peticiones
+    max_overflow=settings.DB_POOL_SIZE,
+    pool_timeout=5,  # Fallar pronto si el pool está agotado en vez de encolar 30 s
+    pool_recycle=1800,  # Renovar conexiones con más de 30 min
+    pool_use_lifo=True,  # Reutilizar la última conexión: sentencias preparadas y caché calientes
+    insertmanyvalues_page_size=1000,  # Filas por INSERT multi-VALUES en executemany
     echo=settings.ENV == "development"  # Log SQL en desarrollo
 )
 
+
+@event.listens_for(engine, "connect")
+def configurar_timeouts(dbapi_connection, connection_record):
+    """Fija timeouts por sesión de PostgreSQL en cada conexión nueva del pool"""
+    cursor = dbapi_connection.cursor()
+    # set_config con parámetros: los valores de configuración nunca se interpolan en el SQL
+    for parametro, valor in (
+        ("statement_timeout", settings.DB_STATEMENT_TIMEOUT),
+        ("idle_in_transaction_session_timeout", settings.DB_IDLE_IN_TRANSACTION_TIMEOUT),
+    ):
+        cursor.execute("SELECT set_config(%s, %s, false)", (parametro, str(valor)))
+    cursor.close()
+    # Confirmar para que el rollback del pool no deshaga los SET
+    dbapi_connection.commit()
+
+
+# Engine asíncrono (asyncpg) para endpoints de solo lectura que corren en el
+# event loop; las escrituras siguen en el engine síncrono de arriba.
+# Los timeouts van como parámetros de arranque de la sesión (server_settings).
+# Su pool es la mitad del síncrono: entre los dos, como mucho
+# 3 × DB_POOL_SIZE conexiones por proceso (ver config.py).
+async_engine = create_async_engine(
+    database_url.set(drivername="postgresql+asyncpg"),
+    connect_args={
+        "server_settings": {
+            "jit": "off",
+            "statement_timeout": settings.DB_STATEMENT_TIMEOUT,
+            "idle_in_transaction_session_timeout": settings.DB_IDLE_IN_TRANSACTION_TIMEOUT,
+        },
+    },
+    pool_pre_ping=True,
+    pool_size=max(1, settings.DB_POOL_SIZE // 2),
+    max_overflow=max(1, settings.DB_POOL_SIZE // 2),
+    pool_timeout=5,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+    echo=settings.ENV == "development"
+)
+
+
 # Session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -30,6 +83,12 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -47,6 +106,35 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency para FastAPI que proporciona una sesión asíncrona (asyncpg).
+
+    Uso:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_session)):
+            return (await db.execute(select(Item))).scalars().all()
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@contextmanager
+def obtener_manager() -> Iterator[DatabaseManager]:
+    """
+    DatabaseManager con sesión propia, para usar fuera de Depends(get_db)
+    (respuestas en streaming, tareas en segundo plano, scripts).
+
+    Al salir, session.close() devuelve la conexión al pool; no la cierra.
+
+    Uso:
+        with obtener_manager() as manager:
+            manager.obtener_proyecto(proyecto_id)
+    """
+    with DatabaseManager(SessionLocal()) as manager:
+        yield manager
+
+
 def create_tables():
     """
     Crea todas las tablas en la base de datos.
@@ -3,21 +3,115 @@ Database Manager - CRUD operations para APPmediciones
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional, Dict, Any
+from sqlalchemy import bindparam, func, insert, select, text, update
+from cachetools import TTLCache
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import logging
-import sys
-from pathlib import Path
-
-# Añadir el directorio backend al path
-sys.path.append(str(Path(__file__).parent.parent))
+import threading
 
 from models import Proyecto, Nodo, Concepto, Medicion, TipoConcepto, Usuario
-from database.queries import QueryHelper
+from models.nodo import ORDEN_MAXIMO
+from .queries import QueryHelper
 from utils.security import hash_password
 
 logger = logging.getLogger(__name__)
 
+# Sentencias de rutas calientes, construidas una vez al importar
+# La raíz es el primer nodo sin padre del proyecto (el que inserta
+# crear_proyecto): mover_nodo(nuevo_padre_id=None) también deja nodos sin padre
+_STMT_NODO_RAIZ = select(Nodo).where(
+    Nodo.proyecto_id == bindparam('pid'),
+    Nodo.padre_id.is_(None)
+).order_by(Nodo.id)
+_STMT_CONCEPTO = select(Concepto).where(
+    Concepto.proyecto_id == bindparam('pid'),
+    Concepto.codigo == bindparam('cod')
+)
+_STMT_HIJOS = select(Nodo).where(Nodo.padre_id == bindparam('nid')).order_by(Nodo.orden)
+_STMT_VERSION_PROYECTO = select(Proyecto.fecha_actualizacion).where(Proyecto.id == bindparam('pid'))
+
+# Árboles jerárquicos ya construidos, compartidos por todo el proceso:
+# (proyecto_id, fecha_actualizacion) -> tupla de capítulos (nodos inmutables)
+_CACHE_ARBOL: TTLCache = TTLCache(maxsize=128, ttl=120)
+_CACHE_ARBOL_LOCK = threading.Lock()
+
+# Limpieza por fase (text() construido una vez; con prepare_threshold=0
+# psycopg además prepara la sentencia en el servidor)
+# Los demás nodos sin padre (mover_nodo a la raíz del proyecto) también se borran
+_SQL_FASE1_BORRAR_NODOS = text("""
+    DELETE FROM appmediciones.nodos
+    WHERE proyecto_id = :pid AND id <> :raiz_id
+""")
+_SQL_FASE1_BORRAR_CONCEPTOS = text("""
+    DELETE FROM appmediciones.conceptos
+    WHERE proyecto_id = :pid AND codigo != 'ROOT'
+""")
+# Un solo DELETE con CTEs: se borran los conceptos PARTIDA y, con sus
+# códigos, los nodos que los referencian (DELETE ... USING, hash join en
+# lugar de subconsulta IN). No hay FK nodos → conceptos.
+_SQL_FASE2_BORRAR_PARTIDAS = text("""
+    WITH partidas AS (
+        DELETE FROM appmediciones.conceptos
+        WHERE proyecto_id = :pid AND tipo = 'PARTIDA'
+        RETURNING codigo
+    ),
+    nodos_partida AS (
+        DELETE FROM appmediciones.nodos n
+        USING partidas p
+        WHERE n.proyecto_id = :pid
+          AND n.codigo_concepto = p.codigo
+        RETURNING n.id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM partidas),
+        (SELECT COUNT(*) FROM nodos_partida)
+""")
+
+# Filas por execute() en las inserciones en bloque
+TAMANO_LOTE = 500
+
+# Centinela de _memo (None es un valor cacheable: "no existe")
+_SIN_VALOR = object()
+
+
+def _validar_orden(orden: int) -> int:
+    """Comprueba que orden cabe en la etiqueta del path (chk_nodo_orden_etiqueta)"""
+    if not 0 <= orden < ORDEN_MAXIMO:
+        raise ValueError(f"Orden fuera de rango [0, {ORDEN_MAXIMO}): {orden}")
+    return orden
+
+
+@dataclass(frozen=True, slots=True)
+class NodoArbol:
+    """
+    Nodo del árbol jerárquico devuelto por construir_arbol_jerarquico.
+
+    Con __slots__ cada nodo ocupa un bloque fijo, sin __dict__ por instancia
+    (árboles de decenas de miles de nodos). Es inmutable (frozen, hijos en
+    tuplas) porque los árboles cacheados se comparten entre peticiones.
+    """
+    id: int
+    codigo: str
+    nombre: Optional[str]
+    resumen: Optional[str]
+    descripcion: Optional[str]
+    tipo: Optional[str]
+    nivel: int
+    orden: int
+    unidad: Optional[str]
+    cantidad: float  # Cantidad del nodo específico
+    cantidad_total: float  # Total del concepto (para resúmenes)
+    precio: float
+    total: float
+    total_calculado: Optional[float]
+    importe: float  # Importe del nodo (cantidad × precio)
+    importe_total: float  # Total del concepto (para resúmenes)
+    padre_id: Optional[int]
+    subcapitulos: Tuple['NodoArbol', ...] = ()
+    partidas: Tuple['NodoArbol', ...] = ()
+
 
 class DatabaseManager:
     """
@@ -26,18 +120,101 @@ class DatabaseManager:
     Proporciona métodos CRUD y operaciones complejas sobre la estructura jerárquica.
     """
 
+    # Columnas de Concepto que actualizar_concepto acepta
+    CAMPOS_CONCEPTO_ACTUALIZABLES = frozenset({
+        'tipo', 'nombre', 'resumen', 'descripcion', 'unidad', 'precio',
+        'total', 'total_calculado', 'cantidad_total', 'importe_total',
+        'tiene_mediciones', 'mediciones_validadas',
+    })
+
     def __init__(self, session: Session):
         self.session = session
         self.queries = QueryHelper(session)
+        # Caché de búsquedas puntuales: (entidad, clave...) -> objeto.
+        # Acotada en tamaño y tiempo para managers de vida larga (cargas de fases)
+        self._req_cache: TTLCache = TTLCache(maxsize=4096, ttl=30)
+        # Siguiente orden libre entre hermanos: (proyecto_id, padre_id) -> orden
+        self._orden_cache: Dict[tuple, int] = {}
+        # Dentro de transaccion(): los métodos hacen flush y no commit
+        self._en_transaccion = False
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self._req_cache.clear()
+        self._orden_cache = {}
         if exc_type is not None:
             self.session.rollback()
         self.session.close()
 
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa varias operaciones en una única transacción.
+
+        Dentro del bloque los métodos de escritura solo hacen flush (los IDs
+        y triggers quedan disponibles) y el commit se hace una vez al salir.
+        Si hay una excepción se hace rollback. Los bloques anidados se
+        integran en el exterior.
+
+        Uso:
+            with manager.transaccion():
+                for fila in filas:
+                    manager.crear_concepto(...)
+        """
+        if self._en_transaccion:
+            yield self
+            return
+
+        self._en_transaccion = True
+        try:
+            yield self
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            self._req_cache.clear()
+            self._orden_cache = {}
+            raise
+        finally:
+            self._en_transaccion = False
+
+    def _confirmar(self):
+        """Commit, o solo flush si hay una transaccion() abierta"""
+        if self._en_transaccion:
+            self.session.flush()
+        else:
+            self.session.commit()
+
+    def _memo(self, key: tuple, loader):
+        """Devuelve el valor cacheado para key o lo carga con loader() y lo guarda"""
+        # get() con centinela: la entrada puede caducar entre "in" y "[]"
+        valor = self._req_cache.get(key, _SIN_VALOR)
+        if valor is not _SIN_VALOR:
+            return valor
+        valor = loader()
+        self._req_cache[key] = valor
+        return valor
+
+    def _insertar_en_lotes(self, modelo, filas: List[Dict[str, Any]]) -> int:
+        """
+        Inserta filas con insert() + lista de diccionarios (insertmanyvalues).
+
+        Sin objetos ORM ni unit of work: cada lote viaja como un INSERT
+        multi-VALUES. Todo en una sola transacción, confirmada al final.
+        """
+        stmt = insert(modelo)
+        for i in range(0, len(filas), TAMANO_LOTE):
+            self.session.execute(stmt, filas[i:i + TAMANO_LOTE])
+        self._confirmar()
+        return len(filas)
+
+    def _invalidar_concepto(self, concepto: Optional[Concepto]):
+        """Elimina de la caché las dos claves de un concepto"""
+        if concepto is not None:
+            self._req_cache.pop(('concepto', concepto.proyecto_id, concepto.codigo), None)
+            self._req_cache.pop(('concepto_id', concepto.id), None)
+
     # =====================================================
     # USUARIOS
     # =====================================================
@@ -46,10 +223,11 @@ class DatabaseManager:
         self,
         username: str,
         email: str,
-        password: str,
+        password: str = None,
         nombre_completo: str = None,
         empresa: str = None,
-        es_admin: bool = False
+        es_admin: bool = False,
+        password_hash: str = None
     ) -> Usuario:
         """
         Crea un nuevo usuario.
@@ -61,14 +239,19 @@ class DatabaseManager:
             nombre_completo: Nombre completo opcional
             empresa: Empresa opcional
             es_admin: Si es administrador
+            password_hash: Hash ya calculado (p.ej. en un hilo aparte);
+                si se indica, password se ignora
 
         Returns:
             Usuario creado
         """
+        if password_hash is None:
+            password_hash = hash_password(password)
+
         usuario = Usuario(
             username=username,
             email=email,
-            password_hash=hash_password(password),
+            password_hash=password_hash,
             nombre_completo=nombre_completo,
             empresa=empresa,
             es_admin=es_admin,
@@ -76,20 +259,24 @@ class DatabaseManager:
         )
 
         self.session.add(usuario)
-        self.session.commit()
+        self._confirmar()
         logger.info(f"✓ Usuario creado: {username}")
         return usuario
 
     def obtener_usuario(self, usuario_id: int) -> Optional[Usuario]:
         """Obtiene un usuario por ID"""
-        return self.session.query(Usuario).filter_by(id=usuario_id).first()
+        return self._memo(
+            ('usuario', usuario_id),
+            lambda: self.session.query(Usuario).filter_by(id=usuario_id).first()
+        )
 
     def actualizar_usuario(
         self,
         usuario_id: int,
         email: str = None,
         nombre_completo: str = None,
-        password: str = None
+        password: str = None,
+        password_hash: str = None
     ) -> Optional[Usuario]:
         """
         Actualiza datos de un usuario.
@@ -99,6 +286,7 @@ class DatabaseManager:
             email: Nuevo email (opcional)
             nombre_completo: Nuevo nombre (opcional)
             password: Nueva contraseña en texto plano (opcional)
+            password_hash: Hash ya calculado de la nueva contraseña (opcional)
 
         Returns:
             Usuario actualizado o None si no existe
@@ -111,10 +299,12 @@ class DatabaseManager:
             usuario.email = email
         if nombre_completo:
             usuario.nombre_completo = nombre_completo
-        if password:
+        if password_hash:
+            usuario.password_hash = password_hash
+        elif password:
             usuario.password_hash = hash_password(password)
 
-        self.session.commit()
+        self._confirmar()
         logger.info(f"✓ Usuario actualizado: {usuario_id}")
         return usuario
 
@@ -134,26 +324,26 @@ class DatabaseManager:
         Returns:
             Proyecto creado
         """
-        proyecto = Proyecto(
-            usuario_id=usuario_id,
-            nombre=nombre,
-            descripcion=descripcion,
-            estado='borrador'
-        )
-
-        self.session.add(proyecto)
-        self.session.flush()
+        proyecto = self.session.scalars(
+            insert(Proyecto)
+            .values(usuario_id=usuario_id, nombre=nombre, descripcion=descripcion, estado='borrador')
+            .returning(Proyecto)
+        ).one()
+        proyecto_id = proyecto.id
 
         # Crear nodo raíz
-        self._crear_nodo_raiz(proyecto.id)
+        self._crear_nodo_raiz(proyecto_id)
 
-        self.session.commit()
-        logger.info(f"✓ Proyecto creado: {proyecto.id} - {nombre}")
+        self._confirmar()
+        logger.info(f"✓ Proyecto creado: {proyecto_id} - {nombre}")
         return proyecto
 
     def obtener_proyecto(self, proyecto_id: int) -> Optional[Proyecto]:
         """Obtiene un proyecto por ID"""
-        return self.session.query(Proyecto).filter_by(id=proyecto_id).first()
+        return self._memo(
+            ('proyecto', proyecto_id),
+            lambda: self.session.query(Proyecto).filter_by(id=proyecto_id).first()
+        )
 
     def listar_proyectos(self, usuario_id: int, limite: int = 50, offset: int = 0) -> List[Proyecto]:
         """Lista proyectos de un usuario con presupuesto total calculado"""
@@ -166,37 +356,54 @@ class DatabaseManager:
             .all()
         )
 
-        # Calcular presupuesto_total y estadísticas para cada proyecto
-        for proyecto in proyectos:
-            # Obtener totales y conteo de capítulos
-            stats = self.session.execute(
+        if not proyectos:
+            return proyectos
+
+        # Estadísticas de todos los proyectos de la página en dos consultas
+        # agrupadas (antes eran dos consultas por proyecto: N+1)
+        ids = [proyecto.id for proyecto in proyectos]
+
+        # Totales y conteo de capítulos
+        stats_por_proyecto = {
+            row.proyecto_id: row
+            for row in self.session.execute(
                 text("""
                     SELECT
+                        c.proyecto_id,
                         COALESCE(SUM(c.total), 0) as total,
                         COUNT(*) as num_capitulos
                     FROM appmediciones.conceptos c
-                    WHERE c.proyecto_id = :pid
+                    WHERE c.proyecto_id = ANY(:ids)
                       AND c.tipo = 'CAPITULO'
+                    GROUP BY c.proyecto_id
+                """),
+                {'ids': ids}
+            )
+        }
+
+        # Proyectos con mediciones auxiliares
+        con_mediciones = set(
+            self.session.execute(
+                text("""
+                    SELECT DISTINCT c.proyecto_id
+                    FROM appmediciones.mediciones m
+                    INNER JOIN appmediciones.conceptos c ON m.concepto_id = c.id
+                    WHERE c.proyecto_id = ANY(:ids)
                 """),
-                {'pid': proyecto.id}
-            ).fetchone()
+                {'ids': ids}
+            ).scalars()
+        )
+
+        for proyecto in proyectos:
+            stats = stats_por_proyecto.get(proyecto.id)
 
             # Asignar el total calculado (evitar None -> NaN en frontend)
-            proyecto.presupuesto_total = float(stats[0]) if stats and stats[0] else 0.0
+            proyecto.presupuesto_total = float(stats.total) if stats and stats.total else 0.0
 
             # Asignar num_capitulos como atributo dinámico
-            proyecto.num_capitulos = int(stats[1]) if stats and stats[1] else 0
+            proyecto.num_capitulos = int(stats.num_capitulos) if stats else 0
 
-            # Verificar si tiene mediciones auxiliares
-            mediciones_count = self.session.execute(
-                text("""
-                    SELECT COUNT(*) FROM appmediciones.mediciones m
-                    INNER JOIN appmediciones.conceptos c ON m.concepto_id = c.id
-                    WHERE c.proyecto_id = :pid
-                """),
-                {'pid': proyecto.id}
-            ).scalar()
-            proyecto.tiene_mediciones_auxiliares = (mediciones_count or 0) > 0
+            proyecto.tiene_mediciones_auxiliares = proyecto.id in con_mediciones
 
         return proyectos
 
@@ -234,7 +441,8 @@ class DatabaseManager:
         if presupuesto_total is not None:
             proyecto.presupuesto_total = presupuesto_total
 
-        self.session.commit()
+        self._confirmar()
+        self._req_cache.pop(('proyecto', proyecto_id), None)
         logger.info(f"✓ Proyecto actualizado: {proyecto_id}")
         return proyecto
 
@@ -250,7 +458,10 @@ class DatabaseManager:
             return False
 
         self.session.delete(proyecto)
-        self.session.commit()
+        self._confirmar()
+        # El borrado en cascada alcanza a nodos y conceptos cacheados
+        self._req_cache.clear()
+        self._orden_cache = {}
         logger.info(f"✓ Proyecto eliminado: {proyecto_id}")
         return True
 
@@ -279,30 +490,54 @@ class DatabaseManager:
         Returns:
             Concepto creado
         """
-        concepto = Concepto(
-            proyecto_id=proyecto_id,
-            codigo=codigo,
-            tipo=tipo,
-            nombre=nombre,
-            **kwargs
-        )
-
-        self.session.add(concepto)
-        self.session.commit()
+        concepto = self.session.scalars(
+            insert(Concepto)
+            .values(proyecto_id=proyecto_id, codigo=codigo, tipo=tipo, nombre=nombre, **kwargs)
+            .returning(Concepto)
+        ).one()
+
+        self._confirmar()
+        # Puede haber un None cacheado de una búsqueda previa por código
+        self._req_cache.pop(('concepto', proyecto_id, codigo), None)
         logger.debug(f"✓ Concepto creado: {codigo} ({tipo})")
         return concepto
 
+    def crear_conceptos_bulk(self, proyecto_id: int, filas: List[Dict[str, Any]]) -> int:
+        """
+        Crea conceptos en bloque.
+
+        Args:
+            proyecto_id: ID del proyecto
+            filas: Diccionarios con codigo, tipo, nombre y demás columnas
+                (todas las filas con las mismas claves)
+
+        Returns:
+            Número de conceptos creados
+        """
+        if not filas:
+            return 0
+
+        filas = [{**fila, 'proyecto_id': proyecto_id} for fila in filas]
+        creados = self._insertar_en_lotes(Concepto, filas)
+        # Pueden quedar None cacheados de búsquedas previas por código
+        for fila in filas:
+            self._req_cache.pop(('concepto', proyecto_id, fila['codigo']), None)
+        logger.debug(f"✓ {creados} conceptos creados en bloque")
+        return creados
+
     def obtener_concepto(self, proyecto_id: int, codigo: str) -> Optional[Concepto]:
         """Obtiene un concepto por código"""
-        return (
-            self.session.query(Concepto)
-            .filter_by(proyecto_id=proyecto_id, codigo=codigo)
-            .first()
+        return self._memo(
+            ('concepto', proyecto_id, codigo),
+            lambda: self.session.scalars(_STMT_CONCEPTO, {'pid': proyecto_id, 'cod': codigo}).first()
         )
 
     def obtener_concepto_por_id(self, concepto_id: int) -> Optional[Concepto]:
         """Obtiene un concepto por ID"""
-        return self.session.query(Concepto).filter_by(id=concepto_id).first()
+        return self._memo(
+            ('concepto_id', concepto_id),
+            lambda: self.session.query(Concepto).filter_by(id=concepto_id).first()
+        )
 
     def listar_conceptos(
         self,
@@ -321,12 +556,44 @@ class DatabaseManager:
         Returns:
             Lista de conceptos
         """
-        query = self.session.query(Concepto).filter_by(proyecto_id=proyecto_id)
+        return list(self.iter_conceptos(proyecto_id, tipo=tipo, limite=limite))
+
+    def iter_conceptos(
+        self,
+        proyecto_id: int,
+        tipo: TipoConcepto = None,
+        offset: int = 0,
+        limite: int = None
+    ) -> Iterator[Concepto]:
+        """
+        Itera los conceptos de un proyecto sin materializar la lista completa.
+
+        Usa yield_per (cursor de servidor) y lee en particiones de 500 filas,
+        así la memoria no crece con el tamaño del proyecto.
+
+        Args:
+            proyecto_id: ID del proyecto
+            tipo: Filtrar por tipo (opcional)
+            offset: Número de conceptos a saltar
+            limite: Máximo de resultados (None = todos)
+
+        Yields:
+            Conceptos ordenados por código
+        """
+        stmt = select(Concepto).where(Concepto.proyecto_id == proyecto_id)
 
         if tipo:
-            query = query.filter_by(tipo=tipo)
+            stmt = stmt.where(Concepto.tipo == tipo)
+
+        stmt = (
+            stmt.order_by(Concepto.codigo)
+            .offset(offset)
+            .limit(limite)
+            .execution_options(yield_per=500)
+        )
 
-        return query.order_by(Concepto.codigo).limit(limite).all()
+        for particion in self.session.scalars(stmt).partitions():
+            yield from particion
 
     def actualizar_concepto(
         self,
@@ -337,6 +604,9 @@ class DatabaseManager:
         """
         Actualiza campos de un concepto.
 
+        Emite un único UPDATE ... RETURNING sin cargar antes el concepto.
+        Los campos que no están en CAMPOS_CONCEPTO_ACTUALIZABLES se ignoran.
+
         Args:
             proyecto_id: ID del proyecto
             codigo: Código del concepto
@@ -345,15 +615,28 @@ class DatabaseManager:
         Returns:
             Concepto actualizado o None si no existe
         """
-        concepto = self.obtener_concepto(proyecto_id, codigo)
+        valores = {
+            campo: valor for campo, valor in campos.items()
+            if campo in self.CAMPOS_CONCEPTO_ACTUALIZABLES
+        }
+        if not valores:
+            return self.obtener_concepto(proyecto_id, codigo)
+
+        stmt = (
+            update(Concepto)
+            .where(Concepto.proyecto_id == proyecto_id, Concepto.codigo == codigo)
+            .values(**valores)
+            .returning(Concepto)
+            # populate_existing: si el concepto ya estaba en el identity map, se
+            # refresca con la fila devuelta en vez de entregar la instancia antigua
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        concepto = self.session.execute(stmt).scalar_one_or_none()
         if not concepto:
             return None
 
-        for campo, valor in campos.items():
-            if hasattr(concepto, campo):
-                setattr(concepto, campo, valor)
-
-        self.session.commit()
+        self._invalidar_concepto(concepto)
+        self._confirmar()
         logger.debug(f"✓ Concepto actualizado: {codigo}")
         return concepto
 
@@ -377,50 +660,88 @@ class DatabaseManager:
             proyecto_id: ID del proyecto
             codigo_concepto: Código del concepto al que apunta
             padre_id: ID del nodo padre (None = raíz)
-            nivel: Nivel jerárquico (se calcula si no se proporciona)
+            nivel: Ignorado; la BD lo deriva de nlevel(path) al insertar
             orden: Orden entre hermanos (se calcula si no se proporciona)
             cantidad: Cantidad en relación padre-hijo
 
         Returns:
             Nodo creado
-        """
-        # Calcular nivel si no se proporciona
-        if nivel is None:
-            if padre_id is None:
-                nivel = 0
-            else:
-                padre = self.session.query(Nodo).filter_by(id=padre_id).first()
-                nivel = padre.nivel + 1 if padre else 0
 
+        Raises:
+            ValueError: Si orden no está en [0, ORDEN_MAXIMO)
+        """
         # Calcular orden si no se proporciona
         if orden is None:
             orden = self._calcular_siguiente_orden(proyecto_id, padre_id)
+        else:
+            _validar_orden(orden)
+            clave = (proyecto_id, padre_id)
+            if clave in self._orden_cache:
+                self._orden_cache[clave] = max(self._orden_cache[clave], orden + 1)
+
+        # INSERT ... RETURNING: path y nivel (trigger trigger_nodos_calcular_path)
+        # vuelven en la misma ida y vuelta
+        nodo = self.session.scalars(
+            insert(Nodo)
+            .values(
+                proyecto_id=proyecto_id,
+                padre_id=padre_id,
+                codigo_concepto=codigo_concepto,
+                orden=orden,
+                cantidad=cantidad
+            )
+            .returning(Nodo)
+        ).one()
+
+        self._confirmar()
+        logger.debug(f"✓ Nodo creado: {codigo_concepto} (padre={padre_id}, orden={orden})")
+        return nodo
 
-        nodo = Nodo(
-            proyecto_id=proyecto_id,
-            padre_id=padre_id,
-            codigo_concepto=codigo_concepto,
-            nivel=nivel,
-            orden=orden,
-            cantidad=cantidad
-        )
+    def crear_nodos_bulk(self, proyecto_id: int, filas: List[Dict[str, Any]]) -> int:
+        """
+        Crea nodos en bloque.
 
-        self.session.add(nodo)
-        self.session.commit()
-        logger.debug(f"✓ Nodo creado: {codigo_concepto} (nivel={nivel}, orden={orden})")
-        return nodo
+        El trigger de path lee la ruta del padre, así que los padres deben
+        existir antes (p.ej. partidas bajo capítulos ya creados).
+
+        Args:
+            proyecto_id: ID del proyecto
+            filas: Diccionarios con codigo_concepto, padre_id, orden y cantidad
+
+        Returns:
+            Número de nodos creados
+
+        Raises:
+            ValueError: Si algún orden no está en [0, ORDEN_MAXIMO)
+        """
+        if not filas:
+            return 0
+
+        filas = [
+            {
+                'proyecto_id': proyecto_id,
+                'padre_id': fila.get('padre_id'),
+                'codigo_concepto': fila['codigo_concepto'],
+                'orden': _validar_orden(fila.get('orden', 0)),
+                'cantidad': fila.get('cantidad', 1.0),
+            }
+            for fila in filas
+        ]
+        creados = self._insertar_en_lotes(Nodo, filas)
+        self._orden_cache = {}
+        logger.debug(f"✓ {creados} nodos creados en bloque")
+        return creados
 
     def obtener_nodo(self, nodo_id: int) -> Optional[Nodo]:
         """Obtiene un nodo por ID"""
-        return self.session.query(Nodo).filter_by(id=nodo_id).first()
+        return self._memo(
+            ('nodo', nodo_id),
+            lambda: self.session.query(Nodo).filter_by(id=nodo_id).first()
+        )
 
     def obtener_nodo_raiz(self, proyecto_id: int) -> Optional[Nodo]:
         """Obtiene el nodo raíz de un proyecto"""
-        return (
-            self.session.query(Nodo)
-            .filter_by(proyecto_id=proyecto_id, padre_id=None)
-            .first()
-        )
+        return self.session.scalars(_STMT_NODO_RAIZ, {'pid': proyecto_id}).first()
 
     def listar_hijos(self, nodo_id: int) -> List[Nodo]:
         """
@@ -432,12 +753,7 @@ class DatabaseManager:
         Returns:
             Lista de nodos hijos
         """
-        return (
-            self.session.query(Nodo)
-            .filter_by(padre_id=nodo_id)
-            .order_by(Nodo.orden)
-            .all()
-        )
+        return self.session.scalars(_STMT_HIJOS, {'nid': nodo_id}).all()
 
     def obtener_arbol_completo(self, proyecto_id: int) -> List[Dict[str, Any]]:
         """
@@ -448,7 +764,7 @@ class DatabaseManager:
         """
         return self.queries.obtener_arbol_completo(proyecto_id)
 
-    def construir_arbol_jerarquico(self, proyecto_id: int) -> List[Dict[str, Any]]:
+    def construir_arbol_jerarquico(self, proyecto_id: int) -> List[NodoArbol]:
         """
         Construye el árbol jerárquico completo con estructura anidada.
 
@@ -456,59 +772,101 @@ class DatabaseManager:
         - Capítulos son nodos de nivel 1
         - Cada capítulo/subcapítulo tiene arrays 'subcapitulos' y 'partidas' (vacíos si no tiene)
 
+        Los nodos son NodoArbol (dataclass con __slots__); FastAPI los
+        serializa igual que los diccionarios de antes.
+
+        El resultado se cachea (TTL) con clave (proyecto_id, fecha_actualizacion):
+        los triggers de la migración 004 actualizan fecha_actualizacion ante
+        cualquier cambio en nodos o conceptos, así que una escritura cambia
+        la clave y la entrada anterior deja de usarse. Los nodos cacheados se
+        devuelven sin copiar: son de solo lectura (NodoArbol es frozen y sus
+        hijos son tuplas); solo la lista de capítulos es propia de cada llamada.
+
         Returns:
             Lista de capítulos con estructura anidada
         """
-        # Obtener flat list from DB
-        nodos_flat = self.queries.obtener_arbol_completo(proyecto_id)
-
-        if not nodos_flat:
+        # Dentro de transaccion() puede haber cambios sin confirmar: no cachear
+        if self._en_transaccion:
+            return self._construir_arbol_desde_bd(proyecto_id)
+
+        version = self.session.execute(_STMT_VERSION_PROYECTO, {'pid': proyecto_id}).scalar()
+        clave = (proyecto_id, version)
+        # La entrada se guarda como tupla: los nodos son inmutables y cada
+        # llamada recibe su propia lista de capítulos
+        with _CACHE_ARBOL_LOCK:
+            arbol = _CACHE_ARBOL.get(clave)
+        if arbol is not None:
+            return list(arbol)
+
+        arbol = self._construir_arbol_desde_bd(proyecto_id)
+        if version is not None:
+            with _CACHE_ARBOL_LOCK:
+                _CACHE_ARBOL[clave] = tuple(arbol)
+        return arbol
+
+    def _construir_arbol_desde_bd(self, proyecto_id: int) -> List[NodoArbol]:
+        """Construye el árbol anidado leyendo la BD (ver construir_arbol_jerarquico)"""
+        # Una sola consulta: las filas llegan en preorden (ORDER BY path), así
+        # que el padre ya está registrado cuando se lee cada hijo y se puede
+        # anotar como hijo suyo sobre la marcha
+        filas = {}  # nodo_id -> fila, en preorden
+        hijos = {}  # nodo_id -> (ids de subcapítulos, ids de partidas)
+        root_ids = []
+        for bloque in self.queries.bloques_arbol_completo(proyecto_id):
+            for fila in bloque:
+                nodo_id = fila['nodo_id']
+                padre_id = fila['padre_id']
+                filas[nodo_id] = fila
+                hijos[nodo_id] = ([], [])
+
+                # Raíces: nivel=0 o padre_id=None
+                if padre_id is None or fila['nivel'] == 0:
+                    root_ids.append(nodo_id)
+
+                hijos_padre = hijos.get(padre_id)
+                if hijos_padre is not None:
+                    # Partidas a 'partidas', el resto a 'subcapitulos'
+                    hijos_padre[1 if fila['tipo'] == 'PARTIDA' else 0].append(nodo_id)
+
+        if not filas:
             return []
 
-        # Build maps
+        # NodoArbol es inmutable: se construye en preorden inverso, así cada
+        # nodo se crea después de todos sus descendientes
         nodos_map = {}
-        for nodo in nodos_flat:
-            nodo_id = nodo['nodo_id']
-            nodos_map[nodo_id] = {
-                'id': nodo_id,
-                'codigo': nodo['codigo_concepto'],
-                'nombre': nodo.get('nombre', ''),
-                'resumen': nodo.get('resumen', ''),
-                'descripcion': nodo.get('descripcion', ''),
-                'tipo': nodo.get('tipo', ''),
-                'nivel': nodo['nivel'],
-                'orden': nodo['orden'],
-                'unidad': nodo.get('unidad', ''),
-                'cantidad': float(nodo.get('cantidad') or 0),  # Cantidad del nodo específico
-                'cantidad_total': float(nodo.get('cantidad_total') or 0),  # Total del concepto (para resúmenes)
-                'precio': float(nodo.get('precio') or 0),
-                'total': float(nodo.get('total') or 0),
-                'total_calculado': float(nodo.get('total_calculado') or 0) if nodo.get('total_calculado') else None,
-                'importe': float(nodo.get('importe') or 0),  # Importe del nodo (cantidad × precio)
-                'importe_total': float(nodo.get('importe_total') or 0),  # Total del concepto (para resúmenes)
-                'padre_id': nodo['padre_id'],
-                'subcapitulos': [],
-                'partidas': []
-            }
-
-        # Build hierarchy - find root nodes (nivel=0 or padre_id=None)
-        root_nodes = [n for n in nodos_map.values() if n['padre_id'] is None or n['nivel'] == 0]
-
-        # Build children relationships
-        for nodo in nodos_map.values():
-            if nodo['padre_id'] and nodo['padre_id'] in nodos_map:
-                padre = nodos_map[nodo['padre_id']]
-                # If it's a partida, add to partidas array, otherwise to subcapitulos
-                if nodo['tipo'] == 'PARTIDA':
-                    padre['partidas'].append(nodo)
-                else:
-                    padre['subcapitulos'].append(nodo)
+        for nodo_id in reversed(filas):
+            fila = filas[nodo_id]
+            ids_subcapitulos, ids_partidas = hijos[nodo_id]
+            # Los NUMERIC llegan como float8 desde la consulta; NULL = 0
+            nodos_map[nodo_id] = NodoArbol(
+                id=nodo_id,
+                codigo=fila['codigo_concepto'],
+                nombre=fila['nombre'],
+                resumen=fila['resumen'],
+                descripcion=fila['descripcion'],
+                tipo=fila['tipo'],
+                nivel=fila['nivel'],
+                orden=fila['orden'],
+                unidad=fila['unidad'],
+                cantidad=fila['cantidad'] or 0.0,  # Cantidad del nodo específico
+                cantidad_total=fila['cantidad_total'] or 0.0,  # Total del concepto (para resúmenes)
+                precio=fila['precio'] or 0.0,
+                total=fila['total'] or 0.0,
+                total_calculado=fila['total_calculado'] or None,
+                importe=fila['importe'] or 0.0,  # Importe del nodo (cantidad × precio)
+                importe_total=fila['importe_total'] or 0.0,  # Total del concepto (para resúmenes)
+                padre_id=fila['padre_id'],
+                subcapitulos=tuple(nodos_map[h] for h in ids_subcapitulos),
+                partidas=tuple(nodos_map[h] for h in ids_partidas)
+            )
+
+        root_nodes = [nodos_map[nodo_id] for nodo_id in root_ids]
 
         # Get only capitulos (children of root or nivel=1)
         capitulos = []
         for root in root_nodes:
             # Root nodes' children are capitulos
-            capitulos.extend(root['subcapitulos'])
+            capitulos.extend(root.subcapitulos)
 
         # If no children, root nodes themselves are capitulos
         if not capitulos and root_nodes:
@@ -528,7 +886,10 @@ class DatabaseManager:
             return False
 
         self.session.delete(nodo)
-        self.session.commit()
+        self._confirmar()
+        # Los descendientes también se borran (cascade)
+        self._req_cache.clear()
+        self._orden_cache = {}
         logger.debug(f"✓ Nodo eliminado: {nodo_id}")
         return True
 
@@ -548,28 +909,29 @@ class DatabaseManager:
 
         Returns:
             Nodo actualizado o None si no existe
+
+        Raises:
+            ValueError: Si nuevo_orden no está en [0, ORDEN_MAXIMO)
         """
+        if nuevo_orden is not None:
+            _validar_orden(nuevo_orden)
+
         nodo = self.obtener_nodo(nodo_id)
         if not nodo:
             return None
 
-        # Actualizar padre
+        # Actualizar padre (el trigger recalcula path y nivel del subárbol)
         nodo.padre_id = nuevo_padre_id
 
-        # Recalcular nivel
-        if nuevo_padre_id is None:
-            nodo.nivel = 0
-        else:
-            padre = self.obtener_nodo(nuevo_padre_id)
-            nodo.nivel = padre.nivel + 1 if padre else 0
-
         # Actualizar orden
         if nuevo_orden is not None:
             nodo.orden = nuevo_orden
         else:
             nodo.orden = self._calcular_siguiente_orden(nodo.proyecto_id, nuevo_padre_id)
 
-        self.session.commit()
+        self._confirmar()
+        self._req_cache.pop(('nodo', nodo_id), None)
+        self._orden_cache = {}
         logger.debug(f"✓ Nodo movido: {nodo_id} → padre={nuevo_padre_id}")
         return nodo
 
@@ -602,22 +964,23 @@ class DatabaseManager:
         if orden is None:
             orden = self._calcular_siguiente_orden_medicion(concepto_id)
 
-        medicion = Medicion(
-            concepto_id=concepto_id,
-            comentario=comentario,
-            unidades=unidades,
-            largo=largo,
-            ancho=ancho,
-            alto=alto,
-            orden=orden
-        )
-
-        # Calcular subtotal
-        medicion.calcular_subtotal()
+        # INSERT ... RETURNING: el subtotal (columna generada) vuelve con la fila
+        medicion = self.session.scalars(
+            insert(Medicion)
+            .values(
+                concepto_id=concepto_id,
+                comentario=comentario,
+                unidades=unidades,
+                largo=largo,
+                ancho=ancho,
+                alto=alto,
+                orden=orden
+            )
+            .returning(Medicion)
+        ).one()
 
-        self.session.add(medicion)
-        self.session.commit()
         logger.debug(f"✓ Medición creada: {medicion.subtotal} para concepto {concepto_id}")
+        self._confirmar()
         return medicion
 
     def listar_mediciones(self, concepto_id: int) -> List[Medicion]:
@@ -653,23 +1016,17 @@ class DatabaseManager:
 
         # Eliminar todos los nodos excepto el raíz
         nodos_eliminados = self.session.execute(
-            text("""
-                DELETE FROM appmediciones.nodos
-                WHERE proyecto_id = :pid AND id != :raiz_id
-            """),
-            {'pid': proyecto_id, 'raiz_id': nodo_raiz.id}
+            _SQL_FASE1_BORRAR_NODOS, {'pid': proyecto_id, 'raiz_id': nodo_raiz.id}
         ).rowcount
 
         # Eliminar todos los conceptos excepto el raíz (ROOT)
         conceptos_eliminados = self.session.execute(
-            text("""
-                DELETE FROM appmediciones.conceptos
-                WHERE proyecto_id = :pid AND codigo != 'ROOT'
-            """),
-            {'pid': proyecto_id}
+            _SQL_FASE1_BORRAR_CONCEPTOS, {'pid': proyecto_id}
         ).rowcount
 
-        self.session.commit()
+        self._confirmar()
+        self._req_cache.clear()
+        self._orden_cache = {}
         logger.info(f"  ✓ Eliminados {nodos_eliminados} nodos y {conceptos_eliminados} conceptos")
 
     def limpiar_datos_fase2(self, proyecto_id: int):
@@ -685,29 +1042,14 @@ class DatabaseManager:
         """
         logger.info(f"🗑️  Limpiando datos de Fase 2 (solo partidas) para proyecto {proyecto_id}")
 
-        # Eliminar nodos de partidas
-        nodos_eliminados = self.session.execute(
-            text("""
-                DELETE FROM appmediciones.nodos
-                WHERE proyecto_id = :pid
-                AND codigo_concepto IN (
-                    SELECT codigo FROM appmediciones.conceptos
-                    WHERE proyecto_id = :pid AND tipo = 'PARTIDA'
-                )
-            """),
-            {'pid': proyecto_id}
-        ).rowcount
+        # Conceptos PARTIDA y sus nodos en una sola sentencia
+        conceptos_eliminados, nodos_eliminados = self.session.execute(
+            _SQL_FASE2_BORRAR_PARTIDAS, {'pid': proyecto_id}
+        ).one()
 
-        # Eliminar conceptos de partidas
-        conceptos_eliminados = self.session.execute(
-            text("""
-                DELETE FROM appmediciones.conceptos
-                WHERE proyecto_id = :pid AND tipo = 'PARTIDA'
-            """),
-            {'pid': proyecto_id}
-        ).rowcount
-
-        self.session.commit()
+        self._confirmar()
+        self._req_cache.clear()
+        self._orden_cache = {}
         logger.info(f"  ✓ Eliminadas {conceptos_eliminados} partidas ({nodos_eliminados} nodos)")
 
     # =====================================================
@@ -717,45 +1059,54 @@ class DatabaseManager:
     def _crear_nodo_raiz(self, proyecto_id: int) -> Nodo:
         """Crea el nodo raíz del proyecto"""
         # Primero crear concepto raíz
-        concepto_raiz = Concepto(
-            proyecto_id=proyecto_id,
-            codigo="ROOT",
-            tipo=TipoConcepto.RAIZ,
-            nombre="Raíz"
+        self.session.execute(
+            insert(Concepto).values(
+                proyecto_id=proyecto_id,
+                codigo="ROOT",
+                tipo=TipoConcepto.RAIZ,
+                nombre="Raíz"
+            )
         )
-        self.session.add(concepto_raiz)
-        self.session.flush()
 
         # Crear nodo raíz
-        nodo_raiz = Nodo(
-            proyecto_id=proyecto_id,
-            padre_id=None,
-            codigo_concepto="ROOT",
-            nivel=0,
-            orden=0,
-            cantidad=1.0
-        )
-        self.session.add(nodo_raiz)
-        self.session.flush()
-
-        return nodo_raiz
+        return self.session.scalars(
+            insert(Nodo)
+            .values(
+                proyecto_id=proyecto_id,
+                padre_id=None,
+                codigo_concepto="ROOT",
+                nivel=0,
+                orden=0,
+                cantidad=1.0
+            )
+            .returning(Nodo)
+        ).one()
 
     def _calcular_siguiente_orden(self, proyecto_id: int, padre_id: int = None) -> int:
-        """Calcula el siguiente orden para hermanos"""
-        max_orden = (
-            self.session.query(Nodo.orden)
-            .filter_by(proyecto_id=proyecto_id, padre_id=padre_id)
-            .order_by(Nodo.orden.desc())
-            .first()
-        )
-        return (max_orden[0] + 1) if max_orden else 1
+        """
+        Calcula el siguiente orden para hermanos.
+
+        Solo consulta MAX(orden) la primera vez por (proyecto_id, padre_id);
+        después incrementa el contador en memoria.
+        """
+        clave = (proyecto_id, padre_id)
+        orden = self._orden_cache.get(clave)
+        if orden is None:
+            max_orden = (
+                self.session.query(func.max(Nodo.orden))
+                .filter_by(proyecto_id=proyecto_id, padre_id=padre_id)
+                .scalar()
+            )
+            orden = (max_orden or 0) + 1
+        _validar_orden(orden)
+        self._orden_cache[clave] = orden + 1
+        return orden
 
     def _calcular_siguiente_orden_medicion(self, concepto_id: int) -> int:
         """Calcula el siguiente orden para mediciones"""
         max_orden = (
-            self.session.query(Medicion.orden)
+            self.session.query(func.max(Medicion.orden))
             .filter_by(concepto_id=concepto_id)
-            .order_by(Medicion.orden.desc())
-            .first()
+            .scalar()
         )
-        return (max_orden[0] + 1) if max_orden else 1
+        return (max_orden or 0) + 1
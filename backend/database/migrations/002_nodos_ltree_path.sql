@@ -0,0 +1,115 @@
+-- =====================================================
+-- APPmediciones - Ruta materializada de nodos (ltree)
+-- =====================================================
+-- Versión: 1.1.0
+-- Descripción: Añade nodos.path (LTREE) mantenido por trigger.
+--              Cada etiqueta es lpad(orden, 6) || '_' || lpad(id, 10),
+--              así que ORDER BY path respeta el orden entre hermanos y
+--              el id garantiza rutas únicas aunque se repita el orden.
+--              orden se limita a [0, 1000000): lpad trunca los valores
+--              más anchos y un signo '-' no es válido en una etiqueta
+--              (los valores existentes fuera de rango se acotan).
+--              Los subárboles se leen con "path <@ :ruta" (índice GiST)
+--              sin WITH RECURSIVE. El nivel se deriva de nlevel(path).
+-- =====================================================
+
+CREATE EXTENSION IF NOT EXISTS ltree;
+
+SET search_path TO appmediciones, public;
+
+-- =====================================================
+-- COLUMNA path
+-- =====================================================
+
+ALTER TABLE nodos ADD COLUMN IF NOT EXISTS path LTREE;
+
+-- La etiqueta reserva 6 dígitos para orden. Los valores fuera de rango que
+-- ya existan se acotan a [0, 999999] antes de añadir la restricción (el orden
+-- relativo entre hermanos se mantiene; los empates los deshace el id)
+UPDATE nodos
+SET orden = LEAST(GREATEST(orden, 0), 999999)
+WHERE orden < 0 OR orden >= 1000000;
+
+ALTER TABLE nodos ADD CONSTRAINT chk_nodo_orden_etiqueta
+    CHECK (orden >= 0 AND orden < 1000000);
+
+-- Etiqueta de un nodo dentro de la ruta
+CREATE OR REPLACE FUNCTION nodo_etiqueta(p_orden INTEGER, p_id INTEGER)
+RETURNS LTREE AS $$
+    SELECT text2ltree(lpad(p_orden::text, 6, '0') || '_' || lpad(p_id::text, 10, '0'));
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Poblar rutas de los nodos existentes (una única pasada recursiva)
+WITH RECURSIVE rutas AS (
+    SELECT id, nodo_etiqueta(orden, id) AS path
+    FROM nodos
+    WHERE padre_id IS NULL
+
+    UNION ALL
+
+    SELECT n.id, r.path || nodo_etiqueta(n.orden, n.id)
+    FROM nodos n
+    INNER JOIN rutas r ON n.padre_id = r.id
+)
+UPDATE nodos n
+SET path = r.path,
+    nivel = nlevel(r.path) - 1
+FROM rutas r
+WHERE n.id = r.id;
+
+CREATE INDEX IF NOT EXISTS idx_nodo_path ON nodos USING GIST (path);
+
+-- =====================================================
+-- TRIGGERS
+-- =====================================================
+
+-- Calcula path y nivel al insertar o al cambiar padre/orden
+CREATE OR REPLACE FUNCTION nodos_calcular_path()
+RETURNS TRIGGER AS $$
+DECLARE
+    padre_path LTREE;
+BEGIN
+    IF NEW.padre_id IS NULL THEN
+        NEW.path = nodo_etiqueta(NEW.orden, NEW.id);
+    ELSE
+        SELECT path INTO padre_path
+        FROM appmediciones.nodos
+        WHERE id = NEW.padre_id;
+
+        NEW.path = padre_path || nodo_etiqueta(NEW.orden, NEW.id);
+    END IF;
+
+    NEW.nivel = nlevel(NEW.path) - 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_nodos_calcular_path
+BEFORE INSERT OR UPDATE OF padre_id, orden ON nodos
+FOR EACH ROW
+EXECUTE FUNCTION nodos_calcular_path();
+
+-- Reescribe la ruta de los descendientes cuando un nodo se mueve
+CREATE OR REPLACE FUNCTION nodos_propagar_path()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.path IS DISTINCT FROM OLD.path THEN
+        UPDATE appmediciones.nodos
+        SET path = NEW.path || subpath(path, nlevel(OLD.path)),
+            nivel = nlevel(NEW.path) + nlevel(path) - nlevel(OLD.path) - 1
+        WHERE proyecto_id = NEW.proyecto_id
+          AND path <@ OLD.path
+          AND id <> NEW.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_nodos_propagar_path
+AFTER UPDATE OF padre_id, orden ON nodos
+FOR EACH ROW
+EXECUTE FUNCTION nodos_propagar_path();
+
+COMMENT ON COLUMN nodos.path IS 'Ruta materializada desde la raíz (ltree, mantenida por trigger)';
+
+COMMIT;
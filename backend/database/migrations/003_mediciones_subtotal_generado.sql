@@ -0,0 +1,25 @@
+-- =====================================================
+-- APPmediciones - Subtotal de mediciones calculado en BD
+-- =====================================================
+-- Versión: 1.2.0
+-- Descripción: mediciones.subtotal pasa a ser una columna generada
+--              (GENERATED ALWAYS ... STORED). PostgreSQL la calcula al
+--              insertar/actualizar, de modo que el cliente ya no la envía
+--              y la carga masiva puede hacerse con COPY FROM STDIN.
+--              Misma regla que antes en Python: dimensión NULL = 1.0
+-- =====================================================
+
+SET search_path TO appmediciones;
+
+ALTER TABLE mediciones DROP COLUMN IF EXISTS subtotal;
+
+ALTER TABLE mediciones
+    ADD COLUMN subtotal NUMERIC(14, 4)
+    GENERATED ALWAYS AS (
+        COALESCE(unidades, 1.0) * COALESCE(largo, 1.0)
+        * COALESCE(ancho, 1.0) * COALESCE(alto, 1.0)
+    ) STORED;
+
+COMMENT ON COLUMN mediciones.subtotal IS 'unidades × largo × ancho × alto (columna generada)';
+
+COMMIT;
@@ -0,0 +1,79 @@
+-- =====================================================
+-- APPmediciones - Versión del árbol en proyectos
+-- =====================================================
+-- Versión: 1.3.0
+-- Descripción: Cualquier INSERT/UPDATE/DELETE sobre nodos o conceptos
+--              actualiza proyectos.fecha_actualizacion de los proyectos
+--              afectados (trigger por sentencia con tablas de transición,
+--              una sola UPDATE por sentencia aunque toque miles de filas).
+--              Solo escribe en proyectos la primera vez por transacción:
+--              las sentencias siguientes de la misma transacción no
+--              vuelven a tocar (ni bloquear) la fila del proyecto.
+--              La caché del árbol jerárquico usa
+--              (proyecto_id, fecha_actualizacion) como clave, así que
+--              cualquier cambio la invalida también entre procesos.
+-- =====================================================
+
+SET search_path TO appmediciones;
+
+CREATE OR REPLACE FUNCTION tocar_proyecto_por_filas()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Guardas: la sentencia no tocó filas, o el proyecto ya se marcó en esta
+    -- transacción (CURRENT_TIMESTAMP es el inicio de la transacción). Así una
+    -- fase que escribe fila a fila actualiza proyectos una sola vez y no
+    -- reescribe ni bloquea la fila del proyecto en cada sentencia.
+    IF TG_OP = 'DELETE' THEN
+        UPDATE appmediciones.proyectos
+        SET fecha_actualizacion = CURRENT_TIMESTAMP
+        WHERE id IN (SELECT DISTINCT proyecto_id FROM filas_antiguas)
+          AND fecha_actualizacion IS DISTINCT FROM CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE appmediciones.proyectos
+        SET fecha_actualizacion = CURRENT_TIMESTAMP
+        WHERE id IN (SELECT DISTINCT proyecto_id FROM filas_nuevas)
+          AND fecha_actualizacion IS DISTINCT FROM CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Nodos
+CREATE TRIGGER trigger_nodos_tocar_proyecto_ins
+AFTER INSERT ON nodos
+REFERENCING NEW TABLE AS filas_nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION tocar_proyecto_por_filas();
+
+CREATE TRIGGER trigger_nodos_tocar_proyecto_upd
+AFTER UPDATE ON nodos
+REFERENCING NEW TABLE AS filas_nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION tocar_proyecto_por_filas();
+
+CREATE TRIGGER trigger_nodos_tocar_proyecto_del
+AFTER DELETE ON nodos
+REFERENCING OLD TABLE AS filas_antiguas
+FOR EACH STATEMENT
+EXECUTE FUNCTION tocar_proyecto_por_filas();
+
+-- Conceptos
+CREATE TRIGGER trigger_conceptos_tocar_proyecto_ins
+AFTER INSERT ON conceptos
+REFERENCING NEW TABLE AS filas_nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION tocar_proyecto_por_filas();
+
+CREATE TRIGGER trigger_conceptos_tocar_proyecto_upd
+AFTER UPDATE ON conceptos
+REFERENCING NEW TABLE AS filas_nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION tocar_proyecto_por_filas();
+
+CREATE TRIGGER trigger_conceptos_tocar_proyecto_del
+AFTER DELETE ON conceptos
+REFERENCING OLD TABLE AS filas_antiguas
+FOR EACH STATEMENT
+EXECUTE FUNCTION tocar_proyecto_por_filas();
+
+COMMIT;
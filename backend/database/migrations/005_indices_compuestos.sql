@@ -0,0 +1,28 @@
+-- =====================================================
+-- APPmediciones - Índices compuestos
+-- =====================================================
+-- Versión: 1.4.0
+-- Descripción: Índices para las consultas de hermanos y raíz:
+--              - (proyecto_id, padre_id, orden): MAX(orden) entre hermanos
+--                en _calcular_siguiente_orden. Sustituye a idx_nodo_proyecto,
+--                que es prefijo suyo.
+--              - (padre_id, orden): hijos de un nodo ya ordenados
+--                (listar_hijos). Sustituye a idx_nodo_padre.
+--              - Parcial WHERE padre_id IS NULL: nodo raíz de un proyecto.
+--              - conceptos (proyecto_id, tipo): limpieza de Fase 2 y
+--                conteos por tipo.
+-- =====================================================
+
+SET search_path TO appmediciones;
+
+CREATE INDEX IF NOT EXISTS idx_nodo_proyecto_padre_orden ON nodos(proyecto_id, padre_id, orden);
+DROP INDEX IF EXISTS idx_nodo_proyecto;
+
+CREATE INDEX IF NOT EXISTS idx_nodo_padre_orden ON nodos(padre_id, orden);
+DROP INDEX IF EXISTS idx_nodo_padre;
+
+CREATE INDEX IF NOT EXISTS idx_nodo_raiz ON nodos(proyecto_id) WHERE padre_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_concepto_proyecto_tipo ON conceptos(proyecto_id, tipo);
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- =====================================================
+-- APPmediciones - Índice cubriente de hijos por proyecto
+-- =====================================================
+-- Versión: 1.5.0
+-- Descripción: Sustituye idx_nodo_proyecto_padre_orden por la misma clave
+--              (proyecto_id, padre_id, orden) con INCLUDE de las columnas
+--              que leen los pasos recursivos de calcular_total_recursivo
+--              (id, codigo_concepto, nivel, cantidad). Así esos pasos se
+--              resuelven con index-only scans, sin visitar el heap.
+--              Se crea CONCURRENTLY: ejecutar fuera de una transacción.
+--              Por eso, a diferencia de 001-005, no termina en COMMIT:
+--              ejecutar con psql -f en modo autocommit (sin -1 /
+--              --single-transaction ni BEGIN previo); CREATE/DROP INDEX
+--              CONCURRENTLY falla dentro de un bloque de transacción.
+-- =====================================================
+
+SET search_path TO appmediciones;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_nodo_proy_padre_cover
+    ON nodos(proyecto_id, padre_id, orden)
+    INCLUDE (id, codigo_concepto, nivel, cantidad);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_nodo_proyecto_padre_orden;
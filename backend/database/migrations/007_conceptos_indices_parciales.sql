@@ -0,0 +1,28 @@
+-- =====================================================
+-- APPmediciones - Índices parciales de conceptos por tipo
+-- =====================================================
+-- Versión: 1.6.0
+-- Descripción: Índices parciales sobre (proyecto_id, codigo):
+--              - Solo PARTIDA, con precio incluido: el join de
+--                calcular_total_recursivo('suma_partidas') se resuelve con
+--                index-only scan, sin combinar idx_concepto_tipo e
+--                idx_concepto_codigo en un bitmap AND.
+--              - Solo CAPITULO/SUBCAPITULO: conteos de estructura en
+--                obtener_estadisticas_proyecto.
+--              Se crean CONCURRENTLY: ejecutar fuera de una transacción.
+--              Por eso, a diferencia de 001-005, no termina en COMMIT:
+--              ejecutar con psql -f en modo autocommit (sin -1 /
+--              --single-transaction ni BEGIN previo); CREATE/DROP INDEX
+--              CONCURRENTLY falla dentro de un bloque de transacción.
+-- =====================================================
+
+SET search_path TO appmediciones;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_concepto_partida
+    ON conceptos(proyecto_id, codigo)
+    INCLUDE (precio)
+    WHERE tipo = 'PARTIDA';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_concepto_capitulo
+    ON conceptos(proyecto_id, codigo)
+    WHERE tipo IN ('CAPITULO', 'SUBCAPITULO');
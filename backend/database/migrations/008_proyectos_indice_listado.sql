@@ -0,0 +1,24 @@
+-- =====================================================
+-- APPmediciones - Índice de listado de proyectos
+-- =====================================================
+-- Versión: 1.7.0
+-- Descripción: listar_proyectos filtra por usuario_id y ordena por
+--              fecha_creacion DESC. (usuario_id, fecha_creacion) resuelve
+--              el filtro y el orden con un único index scan hacia atrás,
+--              sin sort, y para en el LIMIT. Sustituye a
+--              idx_proyecto_usuario, que es prefijo suyo.
+--              idx_proyecto_pdf_hash (001) se mantiene para la detección
+--              de duplicados y ahora también se declara en el modelo.
+--              Se crea CONCURRENTLY: ejecutar fuera de una transacción.
+--              Por eso, a diferencia de 001-005, no termina en COMMIT:
+--              ejecutar con psql -f en modo autocommit (sin -1 /
+--              --single-transaction ni BEGIN previo); CREATE/DROP INDEX
+--              CONCURRENTLY falla dentro de un bloque de transacción.
+-- =====================================================
+
+SET search_path TO appmediciones;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_proyecto_usuario_fecha
+    ON proyectos(usuario_id, fecha_creacion);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_proyecto_usuario;
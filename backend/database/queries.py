@@ -3,9 +3,254 @@ Query Helper - Queries complejas y recursivas
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, bindparam, text
+from sqlalchemy.engine import RowMapping
+from cachetools import TTLCache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from datetime import datetime
 from decimal import Decimal
+from types import MappingProxyType
+import threading
+
+# =====================================================
+# SENTENCIAS (text() construido una sola vez, con tipos fijados)
+# =====================================================
+
+# Lectura para mostrar/serializar: los NUMERIC llegan como float8 (float en
+# Python) en lugar de construir un Decimal por celda
+_SQL_ARBOL_COMPLETO = text("""
+    SELECT
+        n.id as nodo_id,
+        n.proyecto_id,
+        n.padre_id,
+        n.codigo_concepto,
+        n.nivel,
+        n.orden,
+        n.cantidad::float8,
+        n.path::text as path,
+        c.tipo::text,
+        c.nombre,
+        c.resumen,
+        c.descripcion,
+        c.unidad,
+        c.precio::float8,
+        c.total::float8,
+        c.total_calculado::float8,
+        c.cantidad_total::float8,
+        c.importe_total::float8,
+        -- Importe calculado del nodo (cantidad del nodo × precio)
+        (n.cantidad * COALESCE(c.precio, 0))::float8 as importe
+    FROM appmediciones.nodos raiz
+    INNER JOIN appmediciones.nodos n
+        ON n.path <@ raiz.path
+    LEFT JOIN appmediciones.conceptos c
+        ON n.codigo_concepto = c.codigo
+        AND n.proyecto_id = c.proyecto_id
+    WHERE raiz.proyecto_id = :proyecto_id
+      AND raiz.padre_id IS NULL
+    ORDER BY n.path
+""").bindparams(bindparam("proyecto_id", type_=Integer))
+
+# Mismas filas (y mismos tipos) que _SQL_ARBOL_COMPLETO, ya serializadas a JSON
+# por PostgreSQL con los campos de NodoArbolFila (api/schemas/proyecto.py)
+_SQL_ARBOL_COMPLETO_JSON = text("""
+    SELECT
+        json_build_object(
+            'nodo_id', n.id,
+            'proyecto_id', n.proyecto_id,
+            'padre_id', n.padre_id,
+            'codigo_concepto', n.codigo_concepto,
+            'nivel', n.nivel,
+            'orden', n.orden,
+            'cantidad', n.cantidad::float8,
+            'path', n.path::text,
+            'tipo', c.tipo::text,
+            'nombre', c.nombre,
+            'resumen', c.resumen,
+            'descripcion', c.descripcion,
+            'unidad', c.unidad,
+            'precio', c.precio::float8,
+            'total', c.total::float8,
+            'total_calculado', c.total_calculado::float8,
+            'cantidad_total', c.cantidad_total::float8,
+            'importe_total', c.importe_total::float8,
+            'importe', (n.cantidad * COALESCE(c.precio, 0))::float8
+        )::text as fila
+    FROM appmediciones.nodos raiz
+    INNER JOIN appmediciones.nodos n
+        ON n.path <@ raiz.path
+    LEFT JOIN appmediciones.conceptos c
+        ON n.codigo_concepto = c.codigo
+        AND n.proyecto_id = c.proyecto_id
+    WHERE raiz.proyecto_id = :proyecto_id
+      AND raiz.padre_id IS NULL
+    ORDER BY n.path
+""").bindparams(bindparam("proyecto_id", type_=Integer))
+
+_SQL_TOTAL_SUMA_PARTIDAS = text("""
+    WITH RECURSIVE descendientes AS (
+        -- Nodo inicial
+        SELECT id, proyecto_id, codigo_concepto, cantidad
+        FROM appmediciones.nodos
+        WHERE id = :nodo_id
+
+        UNION ALL
+
+        -- Descendientes (solo del mismo proyecto)
+        SELECT n.id, n.proyecto_id, n.codigo_concepto, n.cantidad
+        FROM appmediciones.nodos n
+        INNER JOIN descendientes d
+            ON n.padre_id = d.id
+            AND n.proyecto_id = d.proyecto_id
+    )
+    SELECT COALESCE(SUM(d.cantidad * COALESCE(c.precio, 0)), 0) as total
+    FROM descendientes d
+    INNER JOIN appmediciones.conceptos c
+        ON d.codigo_concepto = c.codigo
+        AND d.proyecto_id = c.proyecto_id
+    WHERE c.tipo = 'PARTIDA'
+""").bindparams(bindparam("nodo_id", type_=Integer))
+
+_SQL_TOTAL_DESCOMPUESTO = text("""
+    WITH RECURSIVE descomp AS (
+        -- Nodo inicial
+        SELECT id, proyecto_id, codigo_concepto, cantidad, 1.0 as factor_acumulado
+        FROM appmediciones.nodos
+        WHERE id = :nodo_id
+
+        UNION ALL
+
+        -- Hijos inmediatos con factor acumulado (mismo proyecto)
+        SELECT
+            n.id,
+            n.proyecto_id,
+            n.codigo_concepto,
+            n.cantidad,
+            d.factor_acumulado * n.cantidad
+        FROM appmediciones.nodos n
+        INNER JOIN descomp d
+            ON n.padre_id = d.id
+            AND n.proyecto_id = d.proyecto_id
+    )
+    SELECT COALESCE(SUM(c.precio * d.factor_acumulado), 0) as total
+    FROM descomp d
+    INNER JOIN appmediciones.conceptos c
+        ON d.codigo_concepto = c.codigo
+        AND d.proyecto_id = c.proyecto_id
+    WHERE d.id != :nodo_id  -- Excluir el nodo raíz
+""").bindparams(bindparam("nodo_id", type_=Integer))
+
+_SQL_TOTAL_SUMA_CONCEPTOS = text("""
+    WITH RECURSIVE descendientes AS (
+        SELECT id, proyecto_id, codigo_concepto
+        FROM appmediciones.nodos
+        WHERE id = :nodo_id
+
+        UNION ALL
+
+        SELECT n.id, n.proyecto_id, n.codigo_concepto
+        FROM appmediciones.nodos n
+        INNER JOIN descendientes d
+            ON n.padre_id = d.id
+            AND n.proyecto_id = d.proyecto_id
+    )
+    SELECT COALESCE(SUM(c.total), 0) as total
+    FROM descendientes d
+    INNER JOIN appmediciones.conceptos c
+        ON d.codigo_concepto = c.codigo
+        AND d.proyecto_id = c.proyecto_id
+""").bindparams(bindparam("nodo_id", type_=Integer))
+
+# Los ancestros de cada nodo son los que contienen su ruta (path @> n.path):
+# se agregan en el orden de la ruta, sin ascender con WITH RECURSIVE.
+_SQL_NODOS_POR_CONCEPTO = text("""
+    SELECT
+        n.id,
+        n.codigo_concepto,
+        n.nivel,
+        string_agg(a.codigo_concepto, ' → ' ORDER BY a.path) as ruta
+    FROM appmediciones.nodos n
+    INNER JOIN appmediciones.nodos a
+        ON a.proyecto_id = n.proyecto_id
+        AND a.path @> n.path
+    WHERE n.proyecto_id = :proyecto_id
+      AND n.codigo_concepto = :codigo_concepto
+    GROUP BY n.id, n.codigo_concepto, n.nivel
+    ORDER BY n.nivel, n.id
+""").bindparams(bindparam("proyecto_id", type_=Integer))
+
+_SQL_ESTADISTICAS_PROYECTO = text("""
+    SELECT
+        COUNT(*) FILTER (WHERE c.tipo = 'CAPITULO') as num_capitulos,
+        COUNT(*) FILTER (WHERE c.tipo = 'SUBCAPITULO') as num_subcapitulos,
+        COUNT(*) FILTER (WHERE c.tipo = 'PARTIDA') as num_partidas,
+        COUNT(*) FILTER (WHERE c.tipo IN ('DESCOMPUESTO', 'MANO_OBRA', 'MATERIAL', 'MAQUINARIA')) as num_descompuestos,
+        MAX(n.nivel) as profundidad_maxima,
+        COUNT(*) as total_nodos
+    FROM appmediciones.nodos n
+    LEFT JOIN appmediciones.conceptos c
+        ON n.codigo_concepto = c.codigo
+        AND n.proyecto_id = c.proyecto_id
+    WHERE n.proyecto_id = :proyecto_id
+""").bindparams(bindparam("proyecto_id", type_=Integer))
+
+# Ambas comprobaciones de verificar_integridad_arbol en una sola consulta,
+# etiquetadas por 'tipo'
+_SQL_INTEGRIDAD_ARBOL = text("""
+    SELECT
+        'nodo_huerfano' as tipo,
+        n.id,
+        n.codigo_concepto,
+        n.padre_id
+    FROM appmediciones.nodos n
+    LEFT JOIN appmediciones.nodos p ON n.padre_id = p.id
+    WHERE n.proyecto_id = :proyecto_id
+      AND n.padre_id IS NOT NULL
+      AND p.id IS NULL
+
+    UNION ALL
+
+    SELECT
+        'concepto_no_encontrado' as tipo,
+        n.id,
+        n.codigo_concepto,
+        NULL as padre_id
+    FROM appmediciones.nodos n
+    LEFT JOIN appmediciones.conceptos c
+        ON n.codigo_concepto = c.codigo
+        AND n.proyecto_id = c.proyecto_id
+    WHERE n.proyecto_id = :proyecto_id
+      AND c.id IS NULL
+""").bindparams(bindparam("proyecto_id", type_=Integer))
+
+# Estadísticas por proyecto, compartidas por todo el proceso:
+# (proyecto_id, fecha_actualizacion) -> mapping de solo lectura. Los triggers
+# de la migración 004 mueven fecha_actualizacion en cada escritura, lo que
+# cambia la clave. Cada llamador recibe su propio dict (valores escalares:
+# basta una copia superficial), así que puede modificarlo sin tocar la caché.
+_CACHE_ESTADISTICAS: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_CACHE_ESTADISTICAS_LOCK = threading.Lock()
+
+
+def _estadisticas_cacheadas(clave: Tuple[int, datetime]) -> Optional[Dict[str, Any]]:
+    with _CACHE_ESTADISTICAS_LOCK:
+        estadisticas = _CACHE_ESTADISTICAS.get(clave)
+    return dict(estadisticas) if estadisticas is not None else None
+
+
+def _guardar_estadisticas(clave: Tuple[int, datetime], estadisticas: Dict[str, Any]):
+    with _CACHE_ESTADISTICAS_LOCK:
+        _CACHE_ESTADISTICAS[clave] = MappingProxyType(dict(estadisticas))
+
+
+def _estadisticas_desde_fila(clave: Tuple[int, Optional[datetime]],
+                             fila: Optional[RowMapping]) -> Dict[str, Any]:
+    """Convierte la fila de _SQL_ESTADISTICAS_PROYECTO y la cachea si hay versión"""
+    estadisticas = dict(fila) if fila else {}
+    if clave[1] is not None:
+        _guardar_estadisticas(clave, estadisticas)
+    return estadisticas
 
 
 class QueryHelper:
@@ -21,100 +266,75 @@ class QueryHelper:
     def __init__(self, session: Session):
         self.session = session
 
-    def obtener_arbol_completo(self, proyecto_id: int) -> List[Dict[str, Any]]:
+    def obtener_arbol_completo(self, proyecto_id: int) -> List[RowMapping]:
         """
         Obtiene el árbol completo del proyecto con datos de conceptos.
 
-        Usa query recursiva (WITH RECURSIVE) para recorrer el árbol.
+        Ver filas_arbol_completo(); aquí se materializan todas las filas.
 
         Returns:
-            Lista de diccionarios con estructura:
+            Lista de filas (mappings) con estructura:
             {
                 'nodo_id': int,
                 'padre_id': int,
                 'codigo_concepto': str,
                 'nivel': int,
                 'orden': int,
-                'cantidad': Decimal,
+                'cantidad': float,
+                'path': str,
                 'tipo': str,
                 'nombre': str,
-                'precio': Decimal,
-                'total': Decimal,
+                'precio': float,
+                'total': float,
                 ...
             }
         """
-        query = text("""
-            WITH RECURSIVE arbol AS (
-                -- Nodos raíz (padre_id IS NULL)
-                SELECT
-                    n.id as nodo_id,
-                    n.proyecto_id,
-                    n.padre_id,
-                    n.codigo_concepto,
-                    n.nivel,
-                    n.orden,
-                    n.cantidad,
-                    ARRAY[n.orden] as ruta_orden,
-                    ARRAY[n.id] as ruta_ids,
-                    c.tipo::text,
-                    c.nombre,
-                    c.resumen,
-                    c.descripcion,
-                    c.unidad,
-                    c.precio,
-                    c.total,
-                    c.total_calculado,
-                    c.cantidad_total,
-                    c.importe_total,
-                    -- NUEVO: Importe calculado del nodo (cantidad del nodo × precio)
-                    n.cantidad * COALESCE(c.precio, 0) as importe
-                FROM appmediciones.nodos n
-                LEFT JOIN appmediciones.conceptos c
-                    ON n.codigo_concepto = c.codigo
-                    AND n.proyecto_id = c.proyecto_id
-                WHERE n.proyecto_id = :proyecto_id
-                  AND n.padre_id IS NULL
-
-                UNION ALL
-
-                -- Nodos hijos (recursivo)
-                SELECT
-                    n.id as nodo_id,
-                    n.proyecto_id,
-                    n.padre_id,
-                    n.codigo_concepto,
-                    n.nivel,
-                    n.orden,
-                    n.cantidad,
-                    a.ruta_orden || n.orden,
-                    a.ruta_ids || n.id,
-                    c.tipo::text,
-                    c.nombre,
-                    c.resumen,
-                    c.descripcion,
-                    c.unidad,
-                    c.precio,
-                    c.total,
-                    c.total_calculado,
-                    c.cantidad_total,
-                    c.importe_total,
-                    -- NUEVO: Importe calculado del nodo (cantidad del nodo × precio)
-                    n.cantidad * COALESCE(c.precio, 0) as importe
-                FROM appmediciones.nodos n
-                INNER JOIN arbol a ON n.padre_id = a.nodo_id
-                LEFT JOIN appmediciones.conceptos c
-                    ON n.codigo_concepto = c.codigo
-                    AND n.proyecto_id = c.proyecto_id
-            )
-            SELECT * FROM arbol
-            ORDER BY ruta_orden;
-        """)
-
-        result = self.session.execute(query, {"proyecto_id": proyecto_id})
-        rows = result.fetchall()
-
-        # Convertir a lista de diccionarios
-        return [dict(row._mapping) for row in rows]
+        return list(self.filas_arbol_completo(proyecto_id))
+
+    def filas_arbol_completo(self, proyecto_id: int) -> Iterator[RowMapping]:
+        """
+        Recorre el árbol completo del proyecto fila a fila (RowMapping).
+
+        Ver bloques_arbol_completo().
+        """
+        for bloque in self.bloques_arbol_completo(proyecto_id):
+            yield from bloque
+
+    def bloques_arbol_completo(self, proyecto_id: int) -> Iterator[List[RowMapping]]:
+        """
+        Recorre el árbol completo del proyecto en bloques de hasta 1000 filas.
+
+        Usa la ruta materializada (nodos.path, ltree): todos los descendientes
+        de la raíz se leen con "path <@ raiz.path" sobre el índice GiST y se
+        ordenan por path, sin WITH RECURSIVE. Al ir en preorden, cada padre
+        aparece antes que sus hijos.
+
+        Las filas se entregan tal cual llegan del driver, sin copiarlas a
+        dict, para que quien construya otra estructura lo haga una sola vez.
+        """
+        # Cursor de servidor: PostgreSQL entrega el árbol en bloques de 1000 filas
+        result = self.session.execute(
+            _SQL_ARBOL_COMPLETO,
+            {"proyecto_id": proyecto_id},
+            execution_options={"yield_per": 1000}
+        )
+
+        yield from result.mappings().partitions()
+
+    def bloques_arbol_json(self, proyecto_id: int) -> Iterator[List[str]]:
+        """
+        Como bloques_arbol_completo(), pero cada fila llega ya como texto JSON
+        generado por PostgreSQL (json_build_object), listo para enviar.
+
+        Evita construir Decimal por celda y el json.dumps en Python.
+        """
+        result = self.session.execute(
+            _SQL_ARBOL_COMPLETO_JSON,
+            {"proyecto_id": proyecto_id},
+            execution_options={"yield_per": 1000}
+        )
+
+        yield from result.scalars().partitions()
 
     def calcular_total_recursivo(
         self,
@@ -135,69 +355,11 @@ class QueryHelper:
             Total calculado
         """
         if tipo_calculo == "suma_partidas":
-            query = text("""
-                WITH RECURSIVE descendientes AS (
-                    -- Nodo inicial
-                    SELECT id, codigo_concepto, cantidad
-                    FROM appmediciones.nodos
-                    WHERE id = :nodo_id
-
-                    UNION ALL
-
-                    -- Descendientes
-                    SELECT n.id, n.codigo_concepto, n.cantidad
-                    FROM appmediciones.nodos n
-                    INNER JOIN descendientes d ON n.padre_id = d.id
-                )
-                SELECT COALESCE(SUM(d.cantidad * COALESCE(c.precio, 0)), 0) as total
-                FROM descendientes d
-                INNER JOIN appmediciones.conceptos c
-                    ON d.codigo_concepto = c.codigo
-                WHERE c.tipo = 'PARTIDA';
-            """)
+            query = _SQL_TOTAL_SUMA_PARTIDAS
         elif tipo_calculo == "descompuesto":
-            query = text("""
-                WITH RECURSIVE descomp AS (
-                    -- Nodo inicial
-                    SELECT id, codigo_concepto, cantidad, 1.0 as factor_acumulado
-                    FROM appmediciones.nodos
-                    WHERE id = :nodo_id
-
-                    UNION ALL
-
-                    -- Hijos inmediatos con factor acumulado
-                    SELECT
-                        n.id,
-                        n.codigo_concepto,
-                        n.cantidad,
-                        d.factor_acumulado * n.cantidad
-                    FROM appmediciones.nodos n
-                    INNER JOIN descomp d ON n.padre_id = d.id
-                )
-                SELECT COALESCE(SUM(c.precio * d.factor_acumulado), 0) as total
-                FROM descomp d
-                INNER JOIN appmediciones.conceptos c
-                    ON d.codigo_concepto = c.codigo
-                WHERE d.id != :nodo_id;  -- Excluir el nodo raíz
-            """)
+            query = _SQL_TOTAL_DESCOMPUESTO
         else:
-            query = text("""
-                WITH RECURSIVE descendientes AS (
-                    SELECT id, codigo_concepto
-                    FROM appmediciones.nodos
-                    WHERE id = :nodo_id
-
-                    UNION ALL
-
-                    SELECT n.id, n.codigo_concepto
-                    FROM appmediciones.nodos n
-                    INNER JOIN descendientes d ON n.padre_id = d.id
-                )
-                SELECT COALESCE(SUM(c.total), 0) as total
-                FROM descendientes d
-                INNER JOIN appmediciones.conceptos c
-                    ON d.codigo_concepto = c.codigo;
-            """)
+            query = _SQL_TOTAL_SUMA_CONCEPTOS
 
         result = self.session.execute(query, {"nodo_id": nodo_id})
         row = result.fetchone()
@@ -207,7 +369,7 @@ class QueryHelper:
         self,
         proyecto_id: int,
         codigo_concepto: str
-    ) -> List[Dict[str, Any]]:
+    ) -> List[RowMapping]:
         """
         Busca todos los nodos que usan un concepto específico.
 
@@ -220,54 +382,25 @@ class QueryHelper:
         Returns:
             Lista de nodos con su ruta en el árbol
         """
-        query = text("""
-            WITH RECURSIVE ruta AS (
-                -- Nodo buscado
-                SELECT
-                    n.id,
-                    n.padre_id,
-                    n.codigo_concepto,
-                    n.nivel,
-                    ARRAY[n.codigo_concepto] as ruta_codigos,
-                    1 as profundidad
-                FROM appmediciones.nodos n
-                WHERE n.proyecto_id = :proyecto_id
-                  AND n.codigo_concepto = :codigo_concepto
-
-                UNION ALL
-
-                -- Ascender al padre
-                SELECT
-                    n.id,
-                    n.padre_id,
-                    n.codigo_concepto,
-                    n.nivel,
-                    n.codigo_concepto || r.ruta_codigos,
-                    r.profundidad + 1
-                FROM appmediciones.nodos n
-                INNER JOIN ruta r ON n.id = r.padre_id
-            )
-            SELECT
-                id,
-                codigo_concepto,
-                nivel,
-                array_to_string(ruta_codigos, ' → ') as ruta
-            FROM ruta
-            WHERE padre_id IS NULL  -- Solo la ruta completa
-            ORDER BY nivel;
-        """)
-
         result = self.session.execute(
-            query,
+            _SQL_NODOS_POR_CONCEPTO,
             {"proyecto_id": proyecto_id, "codigo_concepto": codigo_concepto}
         )
-        rows = result.fetchall()
-        return [dict(row._mapping) for row in rows]
+        return result.mappings().all()
 
-    def obtener_estadisticas_proyecto(self, proyecto_id: int) -> Dict[str, Any]:
+    def obtener_estadisticas_proyecto(
+        self,
+        proyecto_id: int,
+        version: Optional[datetime] = None
+    ) -> Dict[str, Any]:
         """
         Obtiene estadísticas del proyecto.
 
+        Args:
+            proyecto_id: ID del proyecto
+            version: fecha_actualizacion del proyecto; si se indica, el
+                resultado se cachea con clave (proyecto_id, version)
+
         Returns:
             {
                 'num_capitulos': int,
@@ -278,24 +411,14 @@ class QueryHelper:
                 'total_nodos': int
             }
         """
-        query = text("""
-            SELECT
-                COUNT(CASE WHEN c.tipo = 'CAPITULO' THEN 1 END) as num_capitulos,
-                COUNT(CASE WHEN c.tipo = 'SUBCAPITULO' THEN 1 END) as num_subcapitulos,
-                COUNT(CASE WHEN c.tipo = 'PARTIDA' THEN 1 END) as num_partidas,
-                COUNT(CASE WHEN c.tipo IN ('DESCOMPUESTO', 'MANO_OBRA', 'MATERIAL', 'MAQUINARIA') THEN 1 END) as num_descompuestos,
-                MAX(n.nivel) as profundidad_maxima,
-                COUNT(*) as total_nodos
-            FROM appmediciones.nodos n
-            LEFT JOIN appmediciones.conceptos c
-                ON n.codigo_concepto = c.codigo
-                AND n.proyecto_id = c.proyecto_id
-            WHERE n.proyecto_id = :proyecto_id;
-        """)
-
-        result = self.session.execute(query, {"proyecto_id": proyecto_id})
-        row = result.fetchone()
-        return dict(row._mapping) if row else {}
+        clave = (proyecto_id, version)
+        if version is not None:
+            estadisticas = _estadisticas_cacheadas(clave)
+            if estadisticas is not None:
+                return estadisticas
+
+        result = self.session.execute(_SQL_ESTADISTICAS_PROYECTO, {"proyecto_id": proyecto_id})
+        return _estadisticas_desde_fila(clave, result.mappings().first())
 
     def verificar_integridad_arbol(self, proyecto_id: int) -> List[Dict[str, Any]]:
         """
@@ -309,44 +432,48 @@ class QueryHelper:
         Returns:
             Lista de problemas encontrados
         """
-        problemas = []
-
-        # Nodos huérfanos
-        query_huerfanos = text("""
-            SELECT n.id, n.codigo_concepto, n.padre_id
-            FROM appmediciones.nodos n
-            LEFT JOIN appmediciones.nodos p ON n.padre_id = p.id
-            WHERE n.proyecto_id = :proyecto_id
-              AND n.padre_id IS NOT NULL
-              AND p.id IS NULL;
-        """)
-
-        result = self.session.execute(query_huerfanos, {"proyecto_id": proyecto_id})
-        for row in result:
-            problemas.append({
-                'tipo': 'nodo_huerfano',
-                'nodo_id': row.id,
-                'codigo': row.codigo_concepto,
-                'padre_id_invalido': row.padre_id
-            })
-
-        # Conceptos no encontrados
-        query_conceptos = text("""
-            SELECT n.id, n.codigo_concepto
-            FROM appmediciones.nodos n
-            LEFT JOIN appmediciones.conceptos c
-                ON n.codigo_concepto = c.codigo
-                AND n.proyecto_id = c.proyecto_id
-            WHERE n.proyecto_id = :proyecto_id
-              AND c.id IS NULL;
-        """)
-
-        result = self.session.execute(query_conceptos, {"proyecto_id": proyecto_id})
-        for row in result:
-            problemas.append({
-                'tipo': 'concepto_no_encontrado',
-                'nodo_id': row.id,
-                'codigo': row.codigo_concepto
-            })
-
-        return problemas
+        result = self.session.execute(_SQL_INTEGRIDAD_ARBOL, {"proyecto_id": proyecto_id})
+        return [
+            {
+                'tipo': fila['tipo'],
+                'nodo_id': fila['id'],
+                'codigo': fila['codigo_concepto'],
+                'padre_id_invalido': fila['padre_id']
+            }
+            if fila['tipo'] == 'nodo_huerfano' else
+            {
+                'tipo': fila['tipo'],
+                'nodo_id': fila['id'],
+                'codigo': fila['codigo_concepto']
+            }
+            for fila in result.mappings()
+        ]
+
+
+class AsyncQueryHelper:
+    """
+    Variante asíncrona (AsyncSession + asyncpg) de QueryHelper, solo con las
+    lecturas que usan los endpoints async.
+
+    Comparte con QueryHelper las sentencias y la caché de estadísticas.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def obtener_estadisticas_proyecto(
+        self,
+        proyecto_id: int,
+        version: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Ver QueryHelper.obtener_estadisticas_proyecto()"""
+        clave = (proyecto_id, version)
+        if version is not None:
+            estadisticas = _estadisticas_cacheadas(clave)
+            if estadisticas is not None:
+                return estadisticas
+
+        result = await self.session.execute(
+            _SQL_ESTADISTICAS_PROYECTO, {"proyecto_id": proyecto_id}
+        )
+        return _estadisticas_desde_fila(clave, result.mappings().first())
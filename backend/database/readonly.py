@@ -0,0 +1,119 @@
+"""
+Lecturas de solo consulta - Listados sin ORM
+
+Los endpoints de listado solo serializan filas a JSON, así que aquí se usan
+sentencias Core (select sobre columnas de tabla) y se devuelven RowMapping:
+sin identity map, sin lazy loaders y sin instanciar objetos del modelo.
+Para rutas de edición seguir usando DatabaseManager (objetos ORM).
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.engine import RowMapping
+from typing import Iterator, List
+
+from models import Nodo, Concepto, Medicion, TipoConcepto
+
+_nodos = Nodo.__table__
+_conceptos = Concepto.__table__
+_mediciones = Medicion.__table__
+
+_COLUMNAS_NODO = (
+    _nodos.c.id,
+    _nodos.c.proyecto_id,
+    _nodos.c.padre_id,
+    _nodos.c.codigo_concepto,
+    _nodos.c.nivel,
+    _nodos.c.orden,
+    _nodos.c.cantidad,
+)
+
+
+def listar_hijos_filas(session: Session, padre_id: int) -> List[RowMapping]:
+    """
+    Lista los hijos directos de un nodo, ordenados por 'orden'.
+
+    Args:
+        session: Sesión de base de datos
+        padre_id: ID del nodo padre
+
+    Returns:
+        Filas (mappings) con las columnas del nodo
+    """
+    stmt = (
+        select(*_COLUMNAS_NODO)
+        .where(_nodos.c.padre_id == padre_id)
+        .order_by(_nodos.c.orden)
+    )
+    return session.execute(stmt).mappings().all()
+
+
+def iter_conceptos_filas(
+    session: Session,
+    proyecto_id: int,
+    tipo: TipoConcepto = None,
+    offset: int = 0,
+    limite: int = None
+) -> Iterator[RowMapping]:
+    """
+    Itera conceptos de un proyecto como filas, con cursor de servidor.
+
+    Lee en particiones (yield_per=1000): la memoria no crece con el tamaño
+    del proyecto.
+
+    Args:
+        session: Sesión de base de datos
+        proyecto_id: ID del proyecto
+        tipo: Filtrar por tipo (opcional)
+        offset: Número de conceptos a saltar
+        limite: Máximo de resultados (None = todos)
+
+    Yields:
+        Filas (mappings) con todas las columnas del concepto
+    """
+    stmt = select(_conceptos).where(_conceptos.c.proyecto_id == proyecto_id)
+
+    if tipo:
+        stmt = stmt.where(_conceptos.c.tipo == tipo)
+
+    stmt = (
+        stmt.order_by(_conceptos.c.codigo)
+        .offset(offset)
+        .limit(limite)
+        .execution_options(yield_per=1000)
+    )
+    for particion in session.execute(stmt).mappings().partitions():
+        yield from particion
+
+
+def listar_mediciones_filas(session: Session, concepto_id: int) -> List[RowMapping]:
+    """
+    Lista mediciones de un concepto como filas.
+
+    El subtotal es una columna generada por PostgreSQL
+    (unidades × largo × ancho × alto).
+
+    Args:
+        session: Sesión de base de datos
+        concepto_id: ID del concepto
+
+    Returns:
+        Filas (mappings) con las columnas de la medición
+    """
+    stmt = (
+        select(
+            _mediciones.c.id,
+            _mediciones.c.concepto_id,
+            _mediciones.c.comentario,
+            _mediciones.c.tipo,
+            _mediciones.c.unidades,
+            _mediciones.c.largo,
+            _mediciones.c.ancho,
+            _mediciones.c.alto,
+            _mediciones.c.subtotal,
+            _mediciones.c.orden,
+        )
+        .where(_mediciones.c.concepto_id == concepto_id)
+        .order_by(_mediciones.c.orden)
+    )
+    return session.execute(stmt).mappings().all()
@@ -5,23 +5,36 @@ APPmediciones - FastAPI Main Application
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import sys
 
-# Añadir backend al path
-sys.path.append(str(Path(__file__).parent))
-
 from config import settings
 
-# Configurar logging
+# Configurar logging: en el event loop solo se encola cada registro; la
+# escritura a consola y fichero la hace el hilo de QueueListener
+_handlers_log = [
+    logging.StreamHandler(),
+    RotatingFileHandler(
+        settings.LOGS_DIR / "backend.log",
+        maxBytes=10 * 1024 * 1024,  # 10 MB por fichero
+        backupCount=5,
+        delay=True  # No abrir el fichero hasta el primer registro
+    )
+]
+for _handler in _handlers_log:
+    _handler.setFormatter(logging.Formatter(settings.LOG_FORMAT))
+
+_cola_log: queue.Queue = queue.Queue(-1)
+_queue_handler = QueueHandler(_cola_log)
+# Solo el mensaje: el formato completo lo aplican los handlers del listener
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
-    format=settings.LOG_FORMAT,
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(settings.LOGS_DIR / "backend.log")
-    ]
+    handlers=[_queue_handler]
 )
+log_listener = QueueListener(_cola_log, *_handlers_log, respect_handler_level=True)
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +64,9 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     """Inicialización al arrancar"""
+    # Los registros emitidos antes de este punto esperan en la cola
+    log_listener.start()
+
     logger.info("=" * 60)
     logger.info(f"🚀 {settings.API_TITLE} v{settings.API_VERSION}")
     logger.info(f"   Entorno: {settings.ENV}")
@@ -58,6 +74,11 @@ async def startup_event():
     logger.info(f"   Database: {settings.DATABASE_URL.split('@')[1] if '@' in settings.DATABASE_URL else settings.DATABASE_URL}")
     logger.info("=" * 60)
 
+    # Un único engine por proceso: los módulos no deben cargarse también como backend.*
+    duplicados = [m for m in ('backend.config', 'backend.database.connection') if m in sys.modules]
+    if duplicados:
+        raise RuntimeError(f"Módulos importados dos veces (engine duplicado): {duplicados}")
+
     # Verificar conexión a base de datos
     try:
         from database.connection import engine
@@ -65,6 +86,7 @@ async def startup_event():
         with engine.connect() as conn:
             result = conn.execute(text("SELECT 1"))
             logger.info("✓ Conexión a base de datos OK")
+        logger.info(f"   Pool: {engine.pool.status()}")
     except Exception as e:
         logger.error(f"❌ Error conectando a base de datos: {e}")
         raise
@@ -74,6 +96,8 @@ async def startup_event():
 async def shutdown_event():
     """Limpieza al cerrar"""
     logger.info("👋 Cerrando APPmediciones...")
+    # Vaciar la cola de logs antes de salir
+    log_listener.stop()
 
 
 # =====================================================
@@ -132,7 +156,11 @@ from fastapi.responses import JSONResponse
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Manejador global de excepciones"""
-    logger.error(f"Error no manejado: {exc}", exc_info=True)
+    # Formatear el traceback recorre toda la pila: solo con nivel DEBUG
+    logger.error(
+        f"Error no manejado en {request.method} {request.url.path}: {exc!r}",
+        exc_info=logger.isEnabledFor(logging.DEBUG)
+    )
     return JSONResponse(
         status_code=500,
         content={
@@ -153,5 +181,8 @@ if __name__ == "__main__":
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.ENV == "development",
+        loop="uvloop",  # Bucle de eventos en C (uvicorn[standard])
+        http="httptools",
+        access_log=settings.ENV == "development",  # Una línea por petición solo en desarrollo
         log_level=settings.LOG_LEVEL.lower()
     )
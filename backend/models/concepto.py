@@ -2,7 +2,7 @@
 Modelo Concepto - Datos de cada elemento del presupuesto
 """
 
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Text, DateTime, Index, UniqueConstraint, Enum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Text, DateTime, Index, UniqueConstraint, Enum, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -43,17 +43,31 @@ class Concepto(Base):
         Index('idx_concepto_proyecto', 'proyecto_id'),
         Index('idx_concepto_codigo', 'codigo'),
         Index('idx_concepto_tipo', 'tipo'),
+        Index('idx_concepto_proyecto_tipo', 'proyecto_id', 'tipo'),
+        Index('idx_concepto_partida', 'proyecto_id', 'codigo',
+              postgresql_include=['precio'],
+              postgresql_where=text("tipo = 'PARTIDA'")),
+        Index('idx_concepto_capitulo', 'proyecto_id', 'codigo',
+              postgresql_where=text("tipo IN ('CAPITULO', 'SUBCAPITULO')")),
         UniqueConstraint('proyecto_id', 'codigo', name='uq_concepto_proyecto_codigo'),
         {'schema': SCHEMA_NAME}
     )
 
     # Identificación
     id = Column(Integer, primary_key=True)
-    proyecto_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.proyectos.id'), nullable=False)
+    proyecto_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.proyectos.id', ondelete='CASCADE'), nullable=False)
     codigo = Column(String(50), nullable=False)  # Único dentro del proyecto
 
-    # Tipo de concepto
-    tipo = Column(Enum(TipoConcepto), nullable=False)
+    # Tipo de concepto: mismo tipo nativo que crea la migración 001 (tipo_concepto)
+    tipo = Column(
+        Enum(
+            TipoConcepto,
+            name='tipo_concepto',
+            schema=SCHEMA_NAME,
+            values_callable=lambda e: [x.value for x in e]
+        ),
+        nullable=False
+    )
 
     # Datos comunes
     nombre = Column(String(500))
@@ -82,7 +96,7 @@ class Concepto(Base):
 
     # Relaciones
     proyecto = relationship("Proyecto", back_populates="conceptos")
-    mediciones = relationship("Medicion", back_populates="concepto", cascade="all, delete-orphan")
+    mediciones = relationship("Medicion", back_populates="concepto", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<Concepto(codigo='{self.codigo}', tipo={self.tipo}, nombre='{self.nombre[:30]}...')>"
@@ -2,7 +2,7 @@
 Modelo Medicion - Mediciones dimensionales de partidas
 """
 
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Text, Index, Enum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Text, Index, Enum, Computed
 from sqlalchemy.orm import relationship
 import enum
 from .base import Base, SCHEMA_NAME
@@ -37,11 +37,20 @@ class Medicion(Base):
 
     # Identificación
     id = Column(Integer, primary_key=True)
-    concepto_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.conceptos.id'), nullable=False)
+    concepto_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.conceptos.id', ondelete='CASCADE'), nullable=False)
 
     # Descripción
     comentario = Column(String(500))   # Descripción de la medición
-    tipo = Column(Enum(TipoMedicion), default=TipoMedicion.NORMAL)
+    # Mismo tipo nativo que crea la migración 001 (tipo_medicion)
+    tipo = Column(
+        Enum(
+            TipoMedicion,
+            name='tipo_medicion',
+            schema=SCHEMA_NAME,
+            values_callable=lambda e: [x.value for x in e]
+        ),
+        default=TipoMedicion.NORMAL
+    )
 
     # Dimensiones (fórmula de cálculo)
     unidades = Column(Numeric(14, 4), default=1.0)  # N
@@ -49,8 +58,15 @@ class Medicion(Base):
     ancho = Column(Numeric(14, 4), default=1.0)     # Ancho
     alto = Column(Numeric(14, 4), default=1.0)      # Alto
 
-    # Resultado
-    subtotal = Column(Numeric(14, 4))  # N × Largo × Ancho × Alto
+    # Resultado: columna generada en PostgreSQL (no se envía en INSERT/UPDATE)
+    subtotal = Column(
+        Numeric(14, 4),
+        Computed(
+            "COALESCE(unidades, 1.0) * COALESCE(largo, 1.0)"
+            " * COALESCE(ancho, 1.0) * COALESCE(alto, 1.0)",
+            persisted=True
+        )
+    )  # N × Largo × Ancho × Alto
 
     # Orden de aparición
     orden = Column(Integer, nullable=False)
@@ -61,22 +77,6 @@ class Medicion(Base):
     def __repr__(self):
         return f"<Medicion(id={self.id}, subtotal={self.subtotal}, comentario='{self.comentario[:30]}...')>"
 
-    def calcular_subtotal(self):
-        """
-        Calcula el subtotal basándose en las dimensiones.
-
-        Reglas:
-        - Si una dimensión es NULL, se toma como 1.0
-        - subtotal = unidades × largo × ancho × alto
-        """
-        n = self.unidades or 1.0
-        l = self.largo or 1.0
-        a = self.ancho or 1.0
-        h = self.alto or 1.0
-
-        self.subtotal = n * l * a * h
-        return self.subtotal
-
     @property
     def formula_texto(self):
         """
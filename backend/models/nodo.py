@@ -2,11 +2,37 @@
 Modelo Nodo - Define la estructura jerárquica del presupuesto (árbol)
 """
 
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import CheckConstraint, Column, Integer, String, Numeric, ForeignKey, Index, text
+from sqlalchemy.orm import object_session, relationship
+from sqlalchemy.types import UserDefinedType
 from .base import Base, SCHEMA_NAME
 
 
+# Ruta de códigos de un nodo: sus ancestros son los nodos cuyo path contiene
+# el suyo (incluido él mismo), ordenados por path desde la raíz
+_SQL_RUTA_NODO = text("""
+    SELECT a.codigo_concepto
+    FROM appmediciones.nodos n
+    INNER JOIN appmediciones.nodos a
+        ON a.proyecto_id = n.proyecto_id
+        AND a.path @> n.path
+    WHERE n.id = :nodo_id
+    ORDER BY a.path
+""")
+
+# La etiqueta del path reserva 6 dígitos para orden (migración 002):
+# orden debe estar en [0, ORDEN_MAXIMO)
+ORDEN_MAXIMO = 1000000
+
+
+class Ltree(UserDefinedType):
+    """Tipo LTREE de PostgreSQL (extensión ltree)"""
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "LTREE"
+
+
 class Nodo(Base):
     """
     Nodo en el árbol jerárquico del presupuesto.
@@ -24,17 +50,21 @@ class Nodo(Base):
     """
     __tablename__ = 'nodos'
     __table_args__ = (
-        Index('idx_nodo_proyecto', 'proyecto_id'),
-        Index('idx_nodo_padre', 'padre_id'),
+        Index('idx_nodo_proy_padre_cover', 'proyecto_id', 'padre_id', 'orden',
+              postgresql_include=['id', 'codigo_concepto', 'nivel', 'cantidad']),
+        Index('idx_nodo_padre_orden', 'padre_id', 'orden'),
+        Index('idx_nodo_raiz', 'proyecto_id', postgresql_where=text('padre_id IS NULL')),
         Index('idx_nodo_concepto', 'codigo_concepto'),
         Index('idx_nodo_nivel_orden', 'nivel', 'orden'),
+        Index('idx_nodo_path', 'path', postgresql_using='gist'),
+        CheckConstraint(f'orden >= 0 AND orden < {ORDEN_MAXIMO}', name='chk_nodo_orden_etiqueta'),
         {'schema': SCHEMA_NAME}
     )
 
     # Identificación
     id = Column(Integer, primary_key=True)
-    proyecto_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.proyectos.id'), nullable=False)
-    padre_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.nodos.id'), nullable=True)  # NULL = raíz
+    proyecto_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.proyectos.id', ondelete='CASCADE'), nullable=False)
+    padre_id = Column(Integer, ForeignKey(f'{SCHEMA_NAME}.nodos.id', ondelete='CASCADE'), nullable=True)  # NULL = raíz
 
     # Referencia al concepto (datos del elemento)
     codigo_concepto = Column(String(50), nullable=False)
@@ -43,6 +73,10 @@ class Nodo(Base):
     nivel = Column(Integer, nullable=False)  # 0=raíz, 1=capítulo, 2=subcap, 3=partida, 4=descompuesto...
     orden = Column(Integer, nullable=False)  # Orden entre hermanos (mismo nivel, mismo padre)
 
+    # Ruta materializada desde la raíz (ej: '000000_0000000001.000003_0000000007')
+    # La mantiene el trigger trigger_nodos_calcular_path; nivel = nlevel(path) - 1
+    path = Column(Ltree)
+
     # Cantidad en la relación padre-hijo
     # Ejemplo: Si una partida usa 2.5 unidades de un material, cantidad=2.5
     cantidad = Column(Numeric(14, 4), default=1.0)
@@ -53,6 +87,7 @@ class Nodo(Base):
     hijos = relationship("Nodo",
                         back_populates="padre",
                         cascade="all, delete-orphan",
+                        passive_deletes=True,
                         order_by="Nodo.orden")
 
     def __repr__(self):
@@ -73,8 +108,16 @@ class Nodo(Base):
         Obtiene la ruta completa desde la raíz hasta este nodo.
         Retorna una lista de códigos de concepto.
 
+        Usa la sesión a la que pertenece el nodo (ver obtener_ruta_sql). Un
+        nodo sin sesión (transitorio o desasociado) o aún sin id no tiene path
+        que consultar: en ese caso se recorren los padres ya cargados.
+
         Ejemplo: ['C01', 'C01.01', 'E001']
         """
+        session = object_session(self)
+        if session is not None and self.id is not None:
+            return self.obtener_ruta_sql(session)
+
         ruta = []
         nodo_actual = self
         while nodo_actual:
@@ -82,14 +125,21 @@ class Nodo(Base):
             nodo_actual = nodo_actual.padre
         return ruta
 
+    def obtener_ruta_sql(self, session):
+        """
+        Ruta desde la raíz en una sola consulta sobre nodos.path, en lugar
+        de cargar cada padre por separado (un SELECT por nivel).
+
+        Ejemplo: ['C01', 'C01.01', 'E001']
+        """
+        return list(session.execute(_SQL_RUTA_NODO, {"nodo_id": self.id}).scalars())
+
     def obtener_profundidad(self):
         """
         Calcula la profundidad del nodo (distancia desde la raíz).
         La raíz tiene profundidad 0.
+
+        Coincide con 'nivel', que el trigger deriva de nlevel(path) - 1, así
+        que no hace falta recorrer los padres.
         """
-        profundidad = 0
-        nodo_actual = self.padre
-        while nodo_actual:
-            profundidad += 1
-            nodo_actual = nodo_actual.padre
-        return profundidad
+        return self.nivel
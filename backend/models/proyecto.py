@@ -19,7 +19,10 @@ class Proyecto(Base):
     """
     __tablename__ = 'proyectos'
     __table_args__ = (
-        Index('idx_proyecto_usuario', 'usuario_id'),
+        # listar_proyectos: filtra por usuario y ordena por fecha_creacion DESC
+        # (el índice se recorre hacia atrás, sin sort)
+        Index('idx_proyecto_usuario_fecha', 'usuario_id', 'fecha_creacion'),
+        Index('idx_proyecto_pdf_hash', 'pdf_hash'),
         {'schema': SCHEMA_NAME}
     )
 
@@ -51,8 +54,16 @@ class Proyecto(Base):
     estado = Column(String(20), default='borrador')  # borrador, en_proceso, completado
 
     # Relaciones
-    nodos = relationship("Nodo", back_populates="proyecto", cascade="all, delete-orphan")
-    conceptos = relationship("Concepto", back_populates="proyecto", cascade="all, delete-orphan")
+    # passive_deletes: el borrado en cascada lo hace PostgreSQL (ON DELETE CASCADE)
+    # sin que el ORM cargue antes cada hijo.
+    # lazy="raise": un proyecto arrastra miles de nodos/conceptos, así que ni se
+    # cargan por defecto (selectin) ni en diferido (N+1 al recorrer proyectos).
+    # Quien los necesite debe pedirlos en la consulta con selectinload(Proyecto.nodos)
+    # o, mejor, leerlos con QueryHelper / database.readonly.
+    nodos = relationship("Nodo", back_populates="proyecto", cascade="all, delete-orphan",
+                         passive_deletes=True, lazy="raise")
+    conceptos = relationship("Concepto", back_populates="proyecto", cascade="all, delete-orphan",
+                             passive_deletes=True, lazy="raise")
 
     def __repr__(self):
         return f"<Proyecto(id={self.id}, nombre='{self.nombre}', total={self.presupuesto_total})>"
@@ -4,12 +4,62 @@ Analiza la distribución espacial del texto para detectar layouts de múltiples
 """
 
 import logging
-from typing import List, Dict, Tuple, Optional
-from collections import defaultdict
+from typing import List, Dict, Tuple, Optional, Union
+
+import numpy as np
+
+# Numba es opcional: si está instalado, las páginas muy densas se agrupan en
+# bins con un kernel compilado; si no, se usa siempre np.bincount
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# A partir de cuántas palabras compensa el kernel de Numba frente a np.bincount
+_MIN_PALABRAS_NUMBA = 2000
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _bin_x(xs, x_min, bin_size, num_bins):
+        """Histograma de posiciones X en una sola pasada, sin array de índices intermedio"""
+        bins = np.zeros(num_bins, dtype=np.int64)
+        for i in range(xs.shape[0]):
+            k = int((xs[i] - x_min) / bin_size)
+            if k >= num_bins:
+                k = num_bins - 1
+            if k < 0:
+                k = 0
+            bins[k] += 1
+        return bins
+else:
+    _bin_x = None
+
+
+def palabras_soa(words: List[Dict]) -> Dict:
+    """
+    Convierte las palabras de pdfplumber (lista de dicts) a columnas paralelas
+
+    Cada coordenada se lee de los dicts una sola vez; después ColumnDetector
+    trabaja sobre los arrays sin volver a consultar cada palabra.
+
+    Args:
+        words: Lista de palabras de pdfplumber (x0, x1, top, bottom, text)
+
+    Returns:
+        dict con arrays float64 'x0', 'x1', 'top', 'bottom' y la lista 'text'
+    """
+    n = len(words)
+    soa = {
+        clave: np.fromiter((w[clave] for w in words), dtype=np.float64, count=n)
+        for clave in ('x0', 'x1', 'top', 'bottom')
+    }
+    soa['text'] = [w['text'] for w in words]
+    return soa
+
 
 class ColumnDetector:
     """Detecta y procesa layouts de múltiples columnas en PDFs"""
@@ -23,47 +73,55 @@ class ColumnDetector:
         self.threshold_gap = threshold_gap
         self.min_column_width = min_column_width
 
-    def detectar_columnas(self, words: List[Dict]) -> Tuple[int, List[Tuple[float, float]]]:
+    def detectar_columnas(self, words: Union[List[Dict], Dict]) -> Tuple[int, List[Tuple[float, float]]]:
         """
         Detecta el número de columnas y sus rangos X
 
         Args:
             words: Lista de palabras extraídas con pdfplumber (con coordenadas x0, x1, etc.)
+                o las mismas palabras ya convertidas con palabras_soa()
 
         Returns:
             (num_columnas, [(x_min, x_max), ...]) - Número de columnas y sus rangos
         """
-        if not words:
-            return 1, []
+        if not isinstance(words, dict):
+            words = palabras_soa(words)
 
         # Agrupar palabras por posición X (inicio de palabra)
-        x_positions = [w['x0'] for w in words]
+        xs = words['x0']
+        if not len(xs):
+            return 1, []
 
-        # Calcular histograma de posiciones X
-        # Agrupar en bins de 10 puntos para suavizar
-        bin_size = 10
-        x_min = min(x_positions)
         # FIXED: Usar x1 (fin de palabra) para x_max para no cortar dígitos decimales al final
-        x_max = max(w['x1'] for w in words)
+        return self._detectar_columnas(xs, float(xs.min()), float(words['x1'].max()))
 
-        bins = defaultdict(int)
-        for x in x_positions:
-            bin_key = int((x - x_min) / bin_size)
-            bins[bin_key] += 1
+    def _detectar_columnas(self, xs: np.ndarray, x_min: float, x_max: float) -> Tuple[int, List[Tuple[float, float]]]:
+        """
+        detectar_columnas con la extensión horizontal ya calculada
 
-        # Detectar gaps (espacios sin texto)
-        sorted_bins = sorted(bins.keys())
-        gaps = []
+        Args:
+            xs: Posiciones x0 de las palabras (no vacío)
+            x_min: Mínimo de x0
+            x_max: Máximo de x1
 
-        for i in range(len(sorted_bins) - 1):
-            current_bin = sorted_bins[i]
-            next_bin = sorted_bins[i + 1]
+        Returns:
+            (num_columnas, [(x_min, x_max), ...]) - Número de columnas y sus rangos
+        """
+        # Calcular histograma de posiciones X
+        # Agrupar en bins de 10 puntos para suavizar
+        bin_size = 10
 
-            # Si hay un gap grande entre bins
-            gap_size = (next_bin - current_bin) * bin_size
-            if gap_size > self.threshold_gap:
-                gap_center = x_min + (current_bin + next_bin) / 2 * bin_size
-                gaps.append(gap_center)
+        # Histograma de una pasada; los bins ocupados salen ya ordenados
+        if _bin_x is not None and len(xs) > _MIN_PALABRAS_NUMBA:
+            num_bins = int((xs.max() - x_min) / bin_size) + 1
+            bins = _bin_x(xs, x_min, float(bin_size), num_bins)
+        else:
+            bins = np.bincount(((xs - x_min) / bin_size).astype(np.intp))
+        sorted_bins = np.flatnonzero(bins)
+
+        # Detectar gaps (espacios sin texto): saltos grandes entre bins ocupados consecutivos
+        saltos = np.flatnonzero(np.diff(sorted_bins) * bin_size > self.threshold_gap)
+        gaps = (x_min + (sorted_bins[saltos] + sorted_bins[saltos + 1]) / 2 * bin_size).tolist()
 
         # Si no hay gaps, es una sola columna
         if not gaps:
@@ -109,8 +167,9 @@ class ColumnDetector:
         if not words:
             return []
 
-        # Detectar columnas
-        num_columnas, column_ranges = self.detectar_columnas(words)
+        # Detectar columnas (coordenadas leídas una sola vez)
+        soa = palabras_soa(words)
+        num_columnas, column_ranges = self.detectar_columnas(soa)
 
         if num_columnas == 1:
             # Layout vertical normal, procesar directamente
@@ -120,16 +179,21 @@ class ColumnDetector:
         logger.info(f"Procesando PDF con {num_columnas} columnas")
 
         # Separar palabras por columna
-        columnas = [[] for _ in range(num_columnas)]
-
-        for word in words:
-            word_x = word['x0']
+        # Los rangos crecen en x_min y x_max (se solapan por el margen derecho), así que
+        # la primera columna que contiene x es la primera con x < x_max (searchsorted),
+        # siempre que además x_min <= x; si no, la palabra no cae en ninguna columna
+        xs = soa['x0']
+        x_mins = np.array([x_min for x_min, _ in column_ranges])
+        x_maxs = np.array([x_max for _, x_max in column_ranges])
+        indices = np.searchsorted(x_maxs, xs, side='right')
+        dentro = indices < num_columnas
+        dentro[dentro] = x_mins[indices[dentro]] <= xs[dentro]
+        indices[~dentro] = -1
 
-            # Asignar palabra a la columna correcta
-            for i, (x_min, x_max) in enumerate(column_ranges):
-                if x_min <= word_x < x_max:
-                    columnas[i].append(word)
-                    break
+        columnas = [[] for _ in range(num_columnas)]
+        for word, i in zip(words, indices.tolist()):
+            if i >= 0:
+                columnas[i].append(word)
 
         # Procesar cada columna por separado y combinar
         all_lines = []
@@ -141,6 +205,18 @@ class ColumnDetector:
 
         return all_lines
 
+    def agrupar_lineas(self, words: List[Dict]) -> List[str]:
+        """
+        Agrupa en líneas las palabras de una página de una sola columna
+
+        Args:
+            words: Lista de palabras con coordenadas
+
+        Returns:
+            Lista de líneas de texto (arriba a abajo)
+        """
+        return self._procesar_columna_simple(words)
+
     def _procesar_columna_simple(self, words: List[Dict]) -> List[str]:
         """
         Procesa una columna simple: agrupa palabras en líneas por posición Y
@@ -191,17 +267,20 @@ class ColumnDetector:
 
         return lines
 
-    def analizar_layout(self, words: List[Dict]) -> Dict:
+    def analizar_layout(self, words: Union[List[Dict], Dict]) -> Dict:
         """
         Analiza el layout de la página y retorna información detallada
 
         Args:
-            words: Lista de palabras con coordenadas
+            words: Lista de palabras con coordenadas, o su versión palabras_soa()
 
         Returns:
             dict con información del layout
         """
-        if not words:
+        if not isinstance(words, dict):
+            words = palabras_soa(words)
+
+        if not len(words['x0']):
             return {
                 'num_columnas': 0,
                 'tipo': 'vacio',
@@ -209,11 +288,15 @@ class ColumnDetector:
                 'columnas': []
             }
 
-        num_columnas, column_ranges = self.detectar_columnas(words)
+        # Extensión de la página: una sola reducción por coordenada, compartida
+        # con la detección de columnas
+        x_min = float(words['x0'].min())
+        x_max = float(words['x1'].max())
+        num_columnas, column_ranges = self._detectar_columnas(words['x0'], x_min, x_max)
 
         # Determinar orientación (vertical vs apaisado)
-        page_width = max(w['x1'] for w in words) - min(w['x0'] for w in words)
-        page_height = max(w['bottom'] for w in words) - min(w['top'] for w in words)
+        page_width = x_max - x_min
+        page_height = float(words['bottom'].max() - words['top'].min())
         orientacion = 'apaisado' if page_width > page_height else 'vertical'
 
         return {
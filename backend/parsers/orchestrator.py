@@ -24,6 +24,40 @@ from .parsers.tipo1_inline_simple import ParserV2_Tipo1_InlineSimple
 
 logger = logging.getLogger(__name__)
 
+# Patrones compilados una sola vez al importar el módulo.
+# Patrones MÁS ESPECÍFICOS para descompuestos reales (sin distinguir mayúsculas),
+# fusionados en una sola alternativa: una búsqueda por línea en vez de ocho
+_PATRON_DESCOMP = re.compile('|'.join(f'(?:{patron})' for patron in (
+    # Formato: "20 % Esponjamiento 0,2 6.160,20 1.232,04"
+    # Uso [\d.,]+ para soportar separadores de miles (1.234,56)
+    r'^\d+\s*%\s+\w+\s+[\d.,]+\s+[\d.,]+\s+[\d.,]+',
+
+    # Formatos tradicionales
+    r'^\s*%\s*(?:mano|obra|material|materiales|m\.?o\.?)',  # % Mano de obra
+    r'^\s*(?:mo|mat|maq):',  # Mo: Mat: Maq: (abreviaturas al inicio)
+    r'porcentajes?\s*:',  # "Porcentajes:"
+    r'descompuesto\s*:',  # "Descompuesto:"
+    r'^\s*mano\s+de\s+obra\s*[:.]',  # "Mano de obra:" al inicio
+    r'^\s*materiales?\s*[:.]',  # "Material:" o "Materiales:" al inicio
+    r'cos\.?\s*indirecto',  # "Cos. indirecto" o "Coste indirecto"
+)), re.IGNORECASE)
+
+# Patrón MÁS FLEXIBLE para códigos (incluye formatos como m23U01C190, 01.01.01, etc.)
+_PATRON_CODIGO = re.compile(r'^[a-zA-Z0-9]{2,}[\w\.]*\s+\w+\s+[A-Z]')
+
+# Patrón inline: busca líneas que terminan con 3 números (CANT PRECIO IMPORTE)
+# Acepta varios formatos de números: 9,00 o 1.565,00 o 26,89
+_PATRON_INLINE = re.compile(
+    r'^.+?'  # Inicio flexible (código, unidad, resumen)
+    r'\s+'  # Espacio
+    r'\d+[.,]\d{2}'  # Cantidad (ej: 9,00 o 153,00 o 1.565,00)
+    r'\s+'  # Espacio
+    r'\d+[.,]\d{2}'  # Precio (ej: 26,89)
+    r'\s+'  # Espacio
+    r'\d+[.,]\d{2}'  # Importe (ej: 242,01)
+    r'\s*$'  # Fin de línea
+)
+
 
 class PDFOrchestrator:
     """
@@ -48,6 +82,7 @@ class PDFOrchestrator:
         self.proyecto_id = proyecto_id
         self.tipo_detectado = None
         self.parser = None
+        self._datos = None  # Extracción del PDF, compartida con el parser
 
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF no encontrado: {pdf_path}")
@@ -114,8 +149,8 @@ class PDFOrchestrator:
         """
         # Extraer muestra del PDF (ya procesado por ColumnDetector)
         extractor = PDFExtractor(str(self.pdf_path), self.user_id, self.proyecto_id)
-        datos = extractor.extraer_todo()
-        lineas = datos['all_lines'][:50]  # Primeras 50 líneas
+        self._datos = extractor.extraer_todo()
+        lineas = self._datos['all_lines'][:50]  # Primeras 50 líneas
 
         logger.info(f"   → Analizando primeras {len(lineas)} líneas...")
 
@@ -153,35 +188,12 @@ class PDFOrchestrator:
         Returns:
             bool: True si tiene descompuestos, False si no
         """
-        # Patrones MÁS ESPECÍFICOS para descompuestos reales
-        patrones_descomp = [
-            # Formato: "20 % Esponjamiento 0,2 6.160,20 1.232,04"
-            # Uso [\d.,]+ para soportar separadores de miles (1.234,56)
-            r'^\d+\s*%\s+\w+\s+[\d.,]+\s+[\d.,]+\s+[\d.,]+',
-
-            # Formatos tradicionales
-            r'^\s*%\s*(mano|obra|material|materiales|m\.?o\.?)',  # % Mano de obra
-            r'^\s*(mo|mat|maq):',  # Mo: Mat: Maq: (abreviaturas al inicio)
-            r'porcentajes?\s*:',  # "Porcentajes:"
-            r'descompuesto\s*:',  # "Descompuesto:"
-            r'^\s*mano\s+de\s+obra\s*[:.]',  # "Mano de obra:" al inicio
-            r'^\s*materiales?\s*[:.]',  # "Material:" o "Materiales:" al inicio
-            r'cos\.?\s*indirecto',  # "Cos. indirecto" o "Coste indirecto"
-        ]
-
-        count = 0
         for linea in lineas:
-            linea_lower = linea.lower()
-            # Buscar patrones específicos de descompuestos
-            for patron in patrones_descomp:
-                if re.search(patron, linea_lower):
-                    count += 1
-                    logger.debug(f"      Patrón descompuesto detectado en: {linea[:60]}...")
-                    # Con encontrar 1 línea con patrón claro es suficiente
-                    # (algunos documentos tienen descompuestos solo ocasionalmente)
-                    if count >= 1:
-                        return True
-                    break
+            # Con encontrar 1 línea con patrón claro es suficiente
+            # (algunos documentos tienen descompuestos solo ocasionalmente)
+            if _PATRON_DESCOMP.search(linea):
+                logger.debug("      Patrón descompuesto detectado en: %.60s...", linea)
+                return True
 
         return False
 
@@ -201,38 +213,33 @@ class PDFOrchestrator:
         Returns:
             bool: True si datos inline, False si al final
         """
-        # Patrón MÁS FLEXIBLE para códigos (incluye formatos como m23U01C190, 01.01.01, etc.)
-        patron_codigo = re.compile(r'^[a-zA-Z0-9]{2,}[\w\.]*\s+\w+\s+[A-Z]')
-
-        # Patrón inline: busca líneas que terminan con 3 números (CANT PRECIO IMPORTE)
-        # Acepta varios formatos de números: 9,00 o 1.565,00 o 26,89
-        patron_inline = re.compile(
-            r'^.+?'  # Inicio flexible (código, unidad, resumen)
-            r'\s+'  # Espacio
-            r'\d+[.,]\d{2}'  # Cantidad (ej: 9,00 o 153,00 o 1.565,00)
-            r'\s+'  # Espacio
-            r'\d+[.,]\d{2}'  # Precio (ej: 26,89)
-            r'\s+'  # Espacio
-            r'\d+[.,]\d{2}'  # Importe (ej: 242,01)
-            r'\s*$'  # Fin de línea
-        )
-
         lineas_con_codigo = 0
         lineas_con_datos_inline = 0
 
-        for linea in lineas:
+        for i, linea in enumerate(lineas, 1):
             # Detectar si es una línea con código de partida
-            if patron_codigo.match(linea):
-                lineas_con_codigo += 1
-                # Verificar si tiene datos inline (termina con 3 números)
-                if patron_inline.match(linea):
-                    lineas_con_datos_inline += 1
-                    logger.debug(f"      Línea inline detectada: {linea[:80]}...")
+            if not _PATRON_CODIGO.match(linea):
+                continue
+
+            lineas_con_codigo += 1
+            # Verificar si tiene datos inline (termina con 3 números)
+            if _PATRON_INLINE.match(linea):
+                lineas_con_datos_inline += 1
+                logger.debug("      Línea inline detectada: %.80s...", linea)
+
+            # Cortar en cuanto las líneas restantes ya no pueden cambiar la decisión:
+            # - SÍ aunque todas las restantes fueran códigos sin datos inline
+            # - NO aunque todas las restantes fueran códigos con datos inline
+            restantes = len(lineas) - i
+            if (2 * lineas_con_datos_inline > lineas_con_codigo + restantes
+                    or 2 * lineas_con_datos_inline + restantes <= lineas_con_codigo):
+                break
 
         # Decisión: Si más del 50% de códigos tienen datos inline, es tipo inline
         if lineas_con_codigo > 0:
             porcentaje = (lineas_con_datos_inline / lineas_con_codigo) * 100
-            logger.debug(f"      Análisis: {lineas_con_datos_inline}/{lineas_con_codigo} líneas con datos inline ({porcentaje:.1f}%)")
+            logger.debug("      Análisis: %d/%d líneas con datos inline (%.1f%%)",
+                         lineas_con_datos_inline, lineas_con_codigo, porcentaje)
             return porcentaje > 50
 
         # Si no hay códigos detectados, asumir datos al final (más conservador)
@@ -260,7 +267,8 @@ class PDFOrchestrator:
             logger.warning(f"   → Usando TIPO_1 (Proyecto 7) como fallback")
             parser_class = ParserV2_Tipo1_InlineSimple
 
-        return parser_class(str(self.pdf_path), self.user_id, self.proyecto_id)
+        # Reutiliza la extracción de _detectar_tipo: el PDF se lee una sola vez
+        return parser_class(str(self.pdf_path), self.user_id, self.proyecto_id, pre_extracted=self._datos)
 
     def get_tipo_detectado(self) -> str:
         """
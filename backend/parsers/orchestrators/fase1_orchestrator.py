@@ -9,11 +9,15 @@ Autor: Claude Code
 Fecha: 2026-01-25
 """
 import logging
+import re
 from typing import Dict, List
 from ..structure_parsers import StructureParserExplicit, StructureParserImplicit
 
 logger = logging.getLogger(__name__)
 
+# Palabras que marcan el formato explícito (SUBCAPÍTULO queda cubierto por CAPÍTULO)
+_FORMAT_RE = re.compile(r'CAPÍTULO|APARTADO', re.IGNORECASE)
+
 
 class Fase1Orchestrator:
     """
@@ -42,13 +46,12 @@ class Fase1Orchestrator:
         contador_palabras = 0
 
         for linea in lineas[:100]:  # Solo primeras 100 líneas
-            linea_upper = linea.upper()
-            if 'CAPÍTULO' in linea_upper or 'SUBCAPÍTULO' in linea_upper or 'APARTADO' in linea_upper:
+            if _FORMAT_RE.search(linea):
                 contador_palabras += 1
 
-            # Si encontramos al menos 2 ocurrencias, es formato explícito
-            if contador_palabras >= 2:
-                return 'EXPLICIT'
+                # Si encontramos al menos 2 ocurrencias, es formato explícito
+                if contador_palabras >= 2:
+                    return 'EXPLICIT'
 
         # Si no encontramos suficientes ocurrencias, es formato implícito
         return 'IMPLICIT'
@@ -19,17 +19,20 @@ class BaseParserV2(ABC):
     e implementar el método parsear()
     """
 
-    def __init__(self, pdf_path: str, user_id: int, proyecto_id: int):
+    def __init__(self, pdf_path: str, user_id: int, proyecto_id: int, pre_extracted: Dict = None):
         """
         Args:
             pdf_path: Ruta al archivo PDF a parsear
             user_id: ID del usuario (REQUERIDO para nombres de archivos de log)
             proyecto_id: ID del proyecto (REQUERIDO para nombres de archivos de log)
+            pre_extracted: Resultado de PDFExtractor.extraer_todo() ya calculado
+                (opcional, evita volver a leer el PDF)
         """
         self.pdf_path = Path(pdf_path)
         self.pdf_name = self.pdf_path.stem
         self.user_id = user_id
         self.proyecto_id = proyecto_id
+        self.pre_extracted = pre_extracted
 
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF no encontrado: {pdf_path}")
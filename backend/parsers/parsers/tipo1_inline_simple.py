@@ -54,9 +54,9 @@ class ParserV2_Tipo1_InlineSimple(BaseParserV2):
       m23U01C190 Ud DESMONTAJE DE PAPELERA 9,00 26,89 242,01
     """
 
-    def __init__(self, pdf_path: str, user_id: int, proyecto_id: int):
+    def __init__(self, pdf_path: str, user_id: int, proyecto_id: int, pre_extracted: Dict = None):
         # Llamar constructor de clase base
-        super().__init__(pdf_path, user_id, proyecto_id)
+        super().__init__(pdf_path, user_id, proyecto_id, pre_extracted)
 
         # Directorio para resultados intermedios
         self.output_dir = Path("logs/parser_v2_fases")
@@ -108,6 +108,17 @@ class ParserV2_Tipo1_InlineSimple(BaseParserV2):
 
         return resultado_final
 
+    def _obtener_datos_pdf(self) -> Dict:
+        """
+        Devuelve el contenido extraído del PDF, extrayéndolo solo la primera vez
+
+        Si el orquestador ya extrajo el PDF (pre_extracted) se reutiliza tal cual.
+        """
+        if self.pre_extracted is None:
+            self.pdf_extractor = PDFExtractor(str(self.pdf_path), self.user_id, self.proyecto_id)
+            self.pre_extracted = self.pdf_extractor.extraer_todo()
+        return self.pre_extracted
+
     # ================================================================
     # FASE 1: EXTRACCIÓN DE ESTRUCTURA JERÁRQUICA
     # ================================================================
@@ -129,8 +140,7 @@ class ParserV2_Tipo1_InlineSimple(BaseParserV2):
 
         # Paso 1.1: Extraer texto del PDF
         logger.info("  📄 Paso 1.1: Extrayendo texto del PDF con pdfplumber...")
-        self.pdf_extractor = PDFExtractor(str(self.pdf_path), self.user_id, self.proyecto_id)
-        datos_pdf = self.pdf_extractor.extraer_todo()
+        datos_pdf = self._obtener_datos_pdf()
 
         lineas = datos_pdf['all_lines']
         layout_info = datos_pdf.get('layout_summary', {})
@@ -232,12 +242,8 @@ class ParserV2_Tipo1_InlineSimple(BaseParserV2):
         # Paso 2.1: Obtener líneas del PDF
         logger.info("  📋 Paso 2.1: Obteniendo líneas del PDF...")
 
-        # Si no se ejecutó Fase 1 antes, inicializar pdf_extractor
-        if self.pdf_extractor is None:
-            logger.info("    ⚠️ PDF extractor no inicializado, inicializando ahora...")
-            self.pdf_extractor = PDFExtractor(str(self.pdf_path), self.user_id, self.proyecto_id)
-
-        datos_pdf = self.pdf_extractor.extraer_todo()
+        # Reutiliza la extracción de Fase 1 (o la del orquestador)
+        datos_pdf = self._obtener_datos_pdf()
         lineas = datos_pdf['all_lines']
         logger.info(f"    ✓ {len(lineas)} líneas a clasificar")
 
@@ -5,29 +5,175 @@ Soporta detección automática de layouts de múltiples columnas.
 """
 
 import pdfplumber
+import importlib.util
 import logging
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Dict, Optional
 
 try:
-    from .column_detector import ColumnDetector
+    from .column_detector import ColumnDetector, palabras_soa
 except ImportError:
     import sys
     from pathlib import Path
     parent_dir = str(Path(__file__).parent.parent)
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
-    from parser.column_detector import ColumnDetector
+    from parser.column_detector import ColumnDetector, palabras_soa
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extracción en paralelo: solo compensa en documentos largos. Cada extracción
+# arranca sus procesos (spawn: reimportar pdfplumber/NumPy) y cada rango paga
+# abrir el PDF en el worker y serializar sus páginas; por debajo de este umbral
+# la extracción secuencial termina antes
+_MIN_PAGINAS_PARALELO = 40
+_MAX_WORKERS_PAGINAS = 4
+
+# Cachés de texto ya leídas que se mantienen en memoria del proceso (LRU).
+# Peor caso aproximado: 32 documentos × ~5 MB de texto ≈ 160 MB
+_MAX_CACHES_EN_MEMORIA = 32
+
+# Patrones comunes de paginación en pies de página, fusionados en una sola
+# alternativa (case insensitive); el más frecuente va primero
+_PATRON_PIE_PAGINA = re.compile('|'.join(f'(?:{patron})' for patron in (
+    r'^\s*\d+\s*$',                    # Solo número: "23"
+    r'^\s*-\s*\d+\s*-\s*$',            # Con guiones: "- 23 -"
+    r'^\s*página\s+\d+\s*$',           # "Página 23" (case insensitive)
+    r'^\s*pág\.?\s+\d+\s*$',           # "Pág. 23" o "Pag 23"
+    r'^\s*page\s+\d+\s*$',             # "Page 23"
+    r'^\s*p\.\s*\d+\s*$',              # "P. 23"
+    r'^\s*\d+\s*/\s*\d+\s*$',          # "23 / 89" (página X de Y)
+    r'^\s*\[\s*\d+\s*\]\s*$',          # "[23]"
+    r'^\s*\d+\s+de\s+\w+\s+de\s+\d{4}\s+página\s+\d+\s*$',  # "8 de mayo de 2024 Página 1"
+    r'^\s*\d+\s+de\s+\w+\s+de\s+\d{4}\s*$',  # "8 de mayo de 2024" (fecha sola)
+)), re.IGNORECASE)
+
+# Prefijos que descartan una línea como título del proyecto: cabeceras estándar
+# y números de capítulo 01-15 (prefijo, como el startswith al que sustituyen)
+_PATRON_NO_TITULO = re.compile(r'CÓDIGO|PRESUPUESTO|CAPÍTULO|SUBCAPÍTULO|0[1-9]|1[0-5]')
+# Variante de la lectura desde caché (no excluye CAPÍTULO/SUBCAPÍTULO)
+_PATRON_NO_TITULO_CACHE = re.compile(r'CÓDIGO|PRESUPUESTO|0[1-9]|1[0-5]')
+
+# Código de partida al inicio de línea: DEM06, U01AB100, E04SM090, CABLE16, GR0001...
+_PATRON_CODIGO_PARTIDA = re.compile(r'^[A-Z0-9]{2,}[\s\d]')
+
+# _fusionar_datos_numericos_separados
+# Línea con código de partida y unidad (sin números al final)
+# Ej: "SYS UD SEGURIDAD Y SALUD", "GYR UD GESTIÓN DE RESIDUOS", "DEM06 m3 DEMOLICIÓN"
+# El regex solo separa código / unidad / descripción; la unidad se valida después
+# contra _UNIDADES_PARTIDA (búsqueda en set en vez de una alternancia de 30 ramas)
+_PATRON_PARTIDA_SIN_NUMEROS = re.compile(
+    r'^([A-Z][A-Z0-9]{1,19})\s+(\S+)\s+([A-ZÁÉÍÓÚÑ].+)$',
+    re.IGNORECASE
+)
+_UNIDADES_PARTIDA = frozenset({
+    'm', 'm2', 'm3', 'm²', 'm³', 'ml', 'dm', 'cm', 'mm', 'km', 'dm2', 'dm3', 'cm2', 'cm3', 'ha',
+    'ud', 'u', 'pa', 'h', 'l', 'kg', 't', 'tm', 'kw', 'kwh', 'mwh', 'ur', 'u20r', 'p:a',
+    'mes', 'día', 'año', 'sem', 'hora',
+})
+# Metros con divisor: "m/ud", "m2/mes"...
+_PATRON_UNIDAD_METRO_DIVISOR = re.compile(r'm[23²³]?/[a-z]+', re.IGNORECASE)
+# Línea con solo 3 números (cantidad, precio, importe). Formato español: "0,30 15.000,00 4.500,00"
+_PATRON_TRES_NUMEROS_SEPARADOS = re.compile(
+    r'^\s*(\d+(?:\.\d{3})*,\d{1,4})\s+(\d+(?:\.\d{3})*,\d{1,4})\s+(\d+(?:\.\d{3})*,\d{1,2})\s*$'
+)
+# Header de columnas numéricas
+_PATRON_HEADER_NUMERICO = re.compile(r'^\s*CANTIDAD\s+PRECIO\s+IMPORTE\s*$', re.IGNORECASE)
+
+# _reordenar_totales_partida_tras_salto_pagina
+# Línea TOTAL CAPÍTULO/SUBCAPÍTULO (el importe final se comprueba con _PATRON_IMPORTE_FINAL)
+_PATRON_REORDEN_TOTAL = re.compile(
+    r'^TOTAL\s+(SUBCAPÍTULO|CAPÍTULO|APARTADO)\s+([A-Z]?\d{1,2}(?:\.\d{1,2})*)\s+',
+    re.IGNORECASE
+)
+_PATRON_IMPORTE_FINAL = re.compile(r'\d{1,3}(?:\.\d{3})*,\d{2}\s*$')
+# Línea con solo 3 números (totales de partida: cantidad, precio, importe)
+_PATRON_REORDEN_TRES_NUMEROS = re.compile(
+    r'^\s*(\d{1,3}(?:\.\d{3})*,\d{1,4})\s+(\d{1,3}(?:\.\d{3})*,\d{1,4})\s+(\d{1,3}(?:\.\d{3})*,\d{1,4})\s*$'
+)
+# Líneas que son basura (cabeceras fragmentadas)
+_PATRON_REORDEN_BASURA = re.compile(
+    r'^(ANCHURA|ALTURA|PARCIALES|CANTIDAD|PRECIO|IMPORTE|UDS|LONGITUD|CÓDIGO|RESUMEN|'
+    r'PRESUPUESTO|CÓDIGO\s+RESUMEN)',
+    re.IGNORECASE
+)
+# Puntos suspensivos al inicio (importe del TOTAL)
+_PATRON_PUNTOS = re.compile(r'^\.{10,}')
+
+# _fusionar_totales_fragmentados
+# Línea TOTAL sin importe al final. Ej: "TOTAL CAPÍTULO 02 CIMENTACIONES..................."
+_PATRON_TOTAL_SIN_IMPORTE = re.compile(
+    r'^TOTAL\s+(SUBCAPÍTULO|CAPÍTULO|APARTADO)?\s*([A-Z]?\d{1,2}(?:\.\d{1,2})*)\s+([A-ZÁÉÍÓÚÑ][^0-9]*?)\.{3,}\s*$',
+    re.IGNORECASE
+)
+# Alternativa: TOTAL sin tipo pero con código. Ej: "TOTAL 02 CIMENTACIONES..................."
+_PATRON_TOTAL_SIMPLE_SIN_IMPORTE = re.compile(
+    r'^TOTAL\s+(\d{1,2}(?:\.\d{1,2})*)\s+([A-ZÁÉÍÓÚÑ][^0-9]*?)\.{3,}\s*$',
+    re.IGNORECASE
+)
+# Puntos suspensivos + importe. Ej: "........................ 12.050,55"
+_PATRON_PUNTOS_IMPORTE = re.compile(r'^\.{10,}\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$')
+# Basura que se salta al buscar el importe (cabeceras fragmentadas, números sueltos, paginación)
+_PATRON_TOTAL_BASURA = re.compile(
+    r'^(ANCHURA|ALTURA|PARCIALES|CANTIDAD|PRECIO|IMPORTE|UDS|LONGITUD|CÓDIGO|RESUMEN|'
+    r'PRESUPUESTO\s+Y\s+MEDICIONES|PRESUPUESTO|'  # Cabeceras de página
+    r'Página\s+\d+|Pág\.?\s+\d+|'  # Paginación
+    r'\d+,\d+\s+\d+,\d+\s+\d+,\d+|'  # Tres números separados (mediciones)
+    r'[\d.,\s]+)$',  # Solo números y separadores
+    re.IGNORECASE
+)
+# Líneas que empiezan con palabras de cabecera
+_PATRON_CABECERA_FRAGMENTADA = re.compile(
+    r'^(CÓDIGO\s+RESUMEN|ANCHURA\s+ALTURA|UDS\s+LONGITUD)',
+    re.IGNORECASE
+)
+# Línea que empieza por un código de capítulo ("02 ", "2.1 "): fin de la búsqueda
+_PATRON_CODIGO_CAPITULO_INICIO = re.compile(r'^\d{1,2}(?:\.\d{1,2})*\s+')
+
+
+class ResultadoExtraccion(dict):
+    """
+    Resultado de extraer_todo: un dict normal en el que 'all_text' se construye
+    al pedirlo por primera vez
+
+    Casi todos los consumidores solo usan all_lines; unir el documento entero en
+    cada extracción duplicaba su tamaño en memoria para nada.
+    """
+
+    def __missing__(self, clave):
+        if clave == 'all_text' and 'all_lines' in self:
+            texto = self['all_text'] = '\n'.join(self['all_lines'])
+            return texto
+        raise KeyError(clave)
+
+    def get(self, clave, default=None):
+        # dict.get no pasa por __missing__
+        try:
+            return self[clave]
+        except KeyError:
+            return default
+
 
 class PDFExtractor:
     """Extrae texto estructurado desde PDFs de mediciones"""
 
+    # Motores de extracción de texto
+    MOTOR_PDFPLUMBER = "pdfplumber"  # Por defecto: los parsers están calibrados con su salida
+    MOTOR_PYMUPDF = "pymupdf"        # Mucho más rápido; líneas reconstruidas con ColumnDetector
+
     def __init__(self, pdf_path: str, user_id: int, proyecto_id: int,
-                 detect_columns: bool = True, remove_repeated_headers: bool = True):
+                 detect_columns: bool = True, remove_repeated_headers: bool = True,
+                 motor: Optional[str] = None):
         """
         Args:
             pdf_path: Ruta al archivo PDF
@@ -36,10 +182,20 @@ class PDFExtractor:
             detect_columns: Si True, detecta automáticamente layouts de múltiples columnas
                            y extrae cada columna por separado usando bounding boxes
             remove_repeated_headers: Si True, elimina cabeceras repetidas después de la primera aparición
+            motor: MOTOR_PDFPLUMBER o MOTOR_PYMUPDF; si no se indica, el de
+                   settings.PDF_MOTOR
         """
         self.pdf_path = Path(pdf_path)
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF no encontrado: {pdf_path}")
+        if motor is None:
+            motor = _motor_configurado()
+        if motor not in (self.MOTOR_PDFPLUMBER, self.MOTOR_PYMUPDF):
+            raise ValueError(f"Motor de extracción no soportado: {motor}")
+        if motor == self.MOTOR_PYMUPDF and importlib.util.find_spec('fitz') is None:
+            logger.warning("PyMuPDF no está instalado: se usa pdfplumber")
+            motor = self.MOTOR_PDFPLUMBER
+        self.motor = motor
 
         self.pages_text = []
         self.metadata = {}
@@ -78,16 +234,14 @@ class PDFExtractor:
         Extrae todo el contenido del PDF
 
         Returns:
-            dict: {
+            ResultadoExtraccion (dict): {
                 'metadata': {...},
                 'pages': [{'num': 1, 'text': '...', 'lines': [...], 'layout': {...}}, ...],
-                'all_text': 'texto completo',
+                'all_text': 'texto completo',  # se construye al acceder
                 'all_lines': ['línea1', 'línea2', ...],
                 'layout_summary': {'total_columnas': int, 'paginas_multicolumna': int}
             }
         """
-        import os
-
         # CACHÉ: Verificar si ya existe el texto extraído del PDF
         nombre_pdf = self.pdf_path.stem
         cache_dir = Path('logs/extracted_pdfs')
@@ -96,7 +250,6 @@ class PDFExtractor:
         # Formatos a limpiar:
         # - Nuevo: u{user_id}_p{proyecto_id}_{nombre} → {nombre}
         # - Antiguo: {user_id}_{nombre} → {nombre}
-        import re
         nombre_limpio = nombre_pdf
 
         # Intentar quitar formato nuevo: u{user_id}_p{proyecto_id}_
@@ -112,34 +265,38 @@ class PDFExtractor:
 
         # Construir nombre de archivo de caché SIEMPRE incluyendo user_id y proyecto_id
         # Formato: u{user_id}_p{proyecto_id}_{nombre_limpio}_extracted.txt
-        cache_filename = f"u{self.user_id}_p{self.proyecto_id}_{nombre_limpio}_extracted.txt"
+        # (PyMuPDF produce otras líneas: su caché va aparte)
+        sufijo_motor = "" if self.motor == self.MOTOR_PDFPLUMBER else f"_{self.motor}"
+        cache_filename = f"u{self.user_id}_p{self.proyecto_id}_{nombre_limpio}_extracted{sufijo_motor}.txt"
         cache_file = cache_dir / cache_filename
 
         if cache_file.exists():
             logger.info(f"✓ Usando texto cacheado: {cache_file}")
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    lineas = [linea.rstrip('\n') for linea in f.readlines()]
+                # La lectura se memoriza por (ruta, mtime): llamadas repetidas sobre el mismo
+                # PDF no vuelven a leer ni a partir el fichero. Copia propia de la lista
+                # porque los parsers pueden modificarla
+                ruta_cache = str(cache_file.resolve())
+                lineas = list(_leer_cache_texto(ruta_cache, os.stat(ruta_cache).st_mtime_ns))
 
                 # Detectar título del proyecto desde caché
                 titulo_proyecto = None
-                for linea in lineas[:10]:
+                for linea in islice(lineas, 10):
                     linea_limpia = linea.strip()
                     # Buscar línea larga que parezca título (no es cabecera estándar ni código)
                     if (len(linea_limpia) > 30 and
-                        not linea_limpia.startswith(('CÓDIGO', 'PRESUPUESTO', 'CÓDIGO RESUMEN', '01', '02', '03', '04', '05', '06', '07', '08', '09', '10', '11', '12', '13', '14', '15')) and
+                        not _PATRON_NO_TITULO_CACHE.match(linea_limpia) and
                         linea_limpia not in self.header_patterns):
                         titulo_proyecto = linea_limpia
                         logger.info(f"📋 Título del proyecto detectado desde caché: '{titulo_proyecto}'")
                         break
 
-                resultado = {
+                resultado = ResultadoExtraccion({
                     'metadata': {'archivo': self.pdf_path.name, 'from_cache': True},
                     'pages': [],
-                    'all_text': '\n'.join(lineas),
                     'all_lines': lineas,
                     'layout_summary': {'total_columnas': 0, 'paginas_multicolumna': 0}
-                }
+                })
 
                 # Añadir título si se detectó
                 if titulo_proyecto:
@@ -149,94 +306,80 @@ class PDFExtractor:
             except Exception as e:
                 logger.warning(f"⚠️ Error leyendo caché, extrayendo de nuevo: {e}")
 
-        resultado = {
+        resultado = ResultadoExtraccion({
             'metadata': {},
             'pages': [],
-            'all_text': '',
             'all_lines': [],
             'layout_summary': {'total_columnas': 0, 'paginas_multicolumna': 0}
-        }
+        })
 
         try:
-            with pdfplumber.open(self.pdf_path) as pdf:
-                # Extraer metadata
-                resultado['metadata'] = {
-                    'archivo': self.pdf_path.name,
-                    'num_paginas': len(pdf.pages),
-                    'info': pdf.metadata
-                }
-
-                logger.info(f"Extrayendo {len(pdf.pages)} páginas de {self.pdf_path.name}")
-
-                # Extraer cada página
-                for i, page in enumerate(pdf.pages, start=1):
-                    page_data = self._extraer_pagina(page, i)
-                    resultado['pages'].append(page_data)
-                    resultado['all_lines'].extend(page_data['lines'])
-
-                    # Actualizar resumen de layout
-                    if page_data.get('layout'):
-                        num_cols = page_data['layout'].get('num_columnas', 1)
-                        if num_cols > 1:
-                            resultado['layout_summary']['paginas_multicolumna'] += 1
-                        resultado['layout_summary']['total_columnas'] = max(
-                            resultado['layout_summary']['total_columnas'],
-                            num_cols
-                        )
-
-                # Filtrar cabeceras repetidas si está habilitado
-                if self.remove_repeated_headers:
-                    lineas_originales = len(resultado['all_lines'])
-                    resultado['all_lines'], titulo_proyecto = self._filtrar_cabeceras_repetidas(resultado['all_lines'])
-                    # Guardar el título del proyecto en metadata
-                    if titulo_proyecto:
-                        resultado['titulo_proyecto'] = titulo_proyecto
-                    lineas_filtradas = len(resultado['all_lines'])
-                    if lineas_filtradas < lineas_originales:
-                        logger.info(f"🧹 Cabeceras repetidas eliminadas: {lineas_originales} → {lineas_filtradas} líneas ({lineas_originales - lineas_filtradas} eliminadas)")
-
-                # Filtrar pies de página con números de paginación
-                lineas_antes_footer = len(resultado['all_lines'])
+            # Extraer cada página con el motor configurado
+            self._extraer_paginas(resultado)
+
+            # Filtrar cabeceras repetidas (si está habilitado) y pies de página con números
+            # de paginación: ambos filtros son línea a línea, así que van en una sola pasada
+            lineas_originales = len(resultado['all_lines'])
+            if self.remove_repeated_headers:
+                resultado['all_lines'], titulo_proyecto = self._filtrar_cabeceras_repetidas(
+                    resultado['all_lines'], filtrar_pies=True
+                )
+                # Guardar el título del proyecto en metadata
+                if titulo_proyecto:
+                    resultado['titulo_proyecto'] = titulo_proyecto
+            else:
                 resultado['all_lines'] = self._filtrar_pies_pagina(resultado['all_lines'])
-                lineas_despues_footer = len(resultado['all_lines'])
-                if lineas_despues_footer < lineas_antes_footer:
-                    logger.info(f"🗑️  Pies de página eliminados: {lineas_antes_footer - lineas_despues_footer} líneas")
-
-                # Reordenar totales de partida que aparecen después de TOTAL CAPÍTULO (problema de salto de página)
-                resultado['all_lines'] = self._reordenar_totales_partida_tras_salto_pagina(resultado['all_lines'])
-
-                # Fusionar líneas TOTAL fragmentadas (importe en línea separada)
-                lineas_antes_fusion = len(resultado['all_lines'])
-                resultado['all_lines'] = self._fusionar_totales_fragmentados(resultado['all_lines'])
-                fusiones_realizadas = lineas_antes_fusion - len(resultado['all_lines'])
-                if fusiones_realizadas > 0:
-                    logger.info(f"🔗 Líneas TOTAL fusionadas: {fusiones_realizadas} fusiones")
-
-                # NOTA: La fusión de datos numéricos separados ya NO es necesaria porque
-                # las páginas de presupuesto se detectan y procesan con extract_text() estándar,
-                # que preserva correctamente la alineación de números con partidas.
-                # Fusionar números de forma global podía causar fusiones incorrectas.
-
-                resultado['all_text'] = '\n'.join(resultado['all_lines'])
-
-                # Log de información de columnas
-                if resultado['layout_summary']['paginas_multicolumna'] > 0:
-                    logger.info(
-                        f"⚡ Detectadas {resultado['layout_summary']['paginas_multicolumna']} "
-                        f"página(s) con múltiples columnas (máx: {resultado['layout_summary']['total_columnas']} columnas)"
-                    )
-
-                logger.info(f"✓ Extraídas {len(resultado['all_lines'])} líneas")
-
-                # GUARDAR EN CACHÉ para reutilización
-                try:
-                    cache_dir.mkdir(parents=True, exist_ok=True)
-                    with open(cache_file, 'w', encoding='utf-8') as f:
-                        for linea in resultado['all_lines']:
-                            f.write(linea + '\n')
-                    logger.info(f"💾 Texto guardado en caché: {cache_file}")
-                except Exception as e:
-                    logger.warning(f"⚠️ No se pudo guardar caché: {e}")
+            lineas_filtradas = len(resultado['all_lines'])
+            if lineas_filtradas < lineas_originales:
+                logger.info(f"🧹 Cabeceras repetidas y pies de página eliminados: {lineas_originales} → {lineas_filtradas} líneas ({lineas_originales - lineas_filtradas} eliminadas)")
+
+            # Reordenar totales de partida que aparecen después de TOTAL CAPÍTULO (problema de salto de página)
+            resultado['all_lines'] = self._reordenar_totales_partida_tras_salto_pagina(resultado['all_lines'])
+
+            # Fusionar líneas TOTAL fragmentadas (importe en línea separada)
+            lineas_antes_fusion = len(resultado['all_lines'])
+            resultado['all_lines'] = self._fusionar_totales_fragmentados(resultado['all_lines'])
+            fusiones_realizadas = lineas_antes_fusion - len(resultado['all_lines'])
+            if fusiones_realizadas > 0:
+                logger.info(f"🔗 Líneas TOTAL fusionadas: {fusiones_realizadas} fusiones")
+
+            # NOTA: La fusión de datos numéricos separados ya NO es necesaria porque
+            # las páginas de presupuesto se detectan y procesan con extract_text() estándar,
+            # que preserva correctamente la alineación de números con partidas.
+            # Fusionar números de forma global podía causar fusiones incorrectas.
+
+            # Log de información de columnas
+            if resultado['layout_summary']['paginas_multicolumna'] > 0:
+                logger.info(
+                    f"⚡ Detectadas {resultado['layout_summary']['paginas_multicolumna']} "
+                    f"página(s) con múltiples columnas (máx: {resultado['layout_summary']['total_columnas']} columnas)"
+                )
+
+            logger.info(f"✓ Extraídas {len(resultado['all_lines'])} líneas")
+
+            # GUARDAR EN CACHÉ para reutilización
+            # Se escribe en un temporal del mismo directorio y se renombra (atómico): un
+            # lector concurrente o una caída a mitad nunca dejan una caché truncada que
+            # luego se daría por buena
+            tmp_path = None
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                # Una única escritura del documento unido (temporal: no se guarda en resultado)
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir,
+                                                 suffix='.tmp', delete=False) as f:
+                    tmp_path = Path(f.name)
+                    if resultado['all_lines']:
+                        f.write('\n'.join(resultado['all_lines']))
+                        f.write('\n')
+                # NamedTemporaryFile crea el archivo con 0600 y os.replace conserva
+                # el modo: dejarlo legible para otros procesos, como con open()
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, cache_file)
+                logger.info(f"💾 Texto guardado en caché: {cache_file}")
+            except Exception as e:
+                if tmp_path is not None:
+                    tmp_path.unlink(missing_ok=True)
+                logger.warning(f"⚠️ No se pudo guardar caché: {e}")
 
         except Exception as e:
             logger.error(f"Error extrayendo PDF: {e}")
@@ -244,35 +387,146 @@ class PDFExtractor:
 
         return resultado
 
-    def _filtrar_cabeceras_repetidas(self, lineas: List[str]):
+    @contextmanager
+    def _abrir_documento(self):
+        """
+        Abre el PDF con el motor configurado
+
+        Yields:
+            (páginas indexables, metadata del documento)
+        """
+        if self.motor == self.MOTOR_PYMUPDF:
+            import fitz  # PyMuPDF
+
+            with fitz.open(self.pdf_path) as doc:
+                yield doc, doc.metadata
+        else:
+            with pdfplumber.open(self.pdf_path) as pdf:
+                yield pdf.pages, pdf.metadata
+
+    def _extraer_pagina_motor(self, page, num_pagina: int) -> Dict:
+        """Extrae una página con el método del motor configurado"""
+        if self.motor == self.MOTOR_PYMUPDF:
+            return self._extraer_pagina_pymupdf(page, num_pagina)
+        try:
+            return self._extraer_pagina(page, num_pagina)
+        finally:
+            # pdfplumber guarda en cada página sus chars/objetos de pdfminer mientras el
+            # PDF siga abierto; soltarlos al terminar la página acota la memoria a una página
+            page.flush_cache()
+
+    def _extraer_paginas(self, resultado: Dict) -> None:
+        """
+        Abre el PDF con el motor configurado y acumula cada página en resultado
+
+        Rellena resultado['metadata'], ['pages'], ['all_lines'] y ['layout_summary'].
+
+        A partir de _MIN_PAGINAS_PARALELO páginas, las primeras páginas se extraen aquí
+        hasta que una con palabras fija el layout cacheado (una portada vacía no lo
+        fija), y el resto se reparte en rangos contiguos entre procesos, todos con ese
+        mismo layout: igual que en la extracción secuencial, se detecta una vez.
+        """
+        with self._abrir_documento() as (paginas, info):
+            num_paginas = len(paginas)
+
+            # Extraer metadata
+            resultado['metadata'] = {
+                'archivo': self.pdf_path.name,
+                'num_paginas': num_paginas,
+                'info': info
+            }
+
+            logger.info(f"Extrayendo {num_paginas} páginas de {self.pdf_path.name} ({self.motor})")
+
+            num_workers = min(os.cpu_count() or 1, _MAX_WORKERS_PAGINAS)
+            if num_paginas < _MIN_PAGINAS_PARALELO or num_workers < 2:
+                for i, page in enumerate(paginas, start=1):
+                    self._acumular_pagina(resultado, self._extraer_pagina_motor(page, i))
+                return
+
+            # Secuencial hasta tener layout cacheado; sin detección de columnas no
+            # hay layout que esperar
+            siguiente = 1
+            while siguiente <= num_paginas and (
+                siguiente == 1
+                or (self.column_detector is not None and self.cached_num_columnas is None)
+            ):
+                self._acumular_pagina(resultado, self._extraer_pagina_motor(paginas[siguiente - 1], siguiente))
+                siguiente += 1
+
+            # Si quedan pocas páginas no compensa repartirlas
+            if num_paginas - siguiente + 1 < _MIN_PAGINAS_PARALELO:
+                for i in range(siguiente, num_paginas + 1):
+                    self._acumular_pagina(resultado, self._extraer_pagina_motor(paginas[i - 1], i))
+                return
+
+        # Páginas siguiente..N en paralelo, con el layout ya cacheado
+        tamano = -(-(num_paginas - siguiente + 1) // num_workers)
+        rangos = [(inicio, min(inicio + tamano - 1, num_paginas))
+                  for inicio in range(siguiente, num_paginas + 1, tamano)]
+
+        # Pool propio de esta extracción: se cierra (y sus procesos terminan) al salir.
+        # spawn: el proceso del servidor tiene hilos (logging, pool de BD), no es seguro hacer fork
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futuros = [
+                executor.submit(
+                    _extraer_rango_paginas, str(self.pdf_path), self.user_id, self.proyecto_id,
+                    self.detect_columns, self.motor,
+                    self.cached_num_columnas, self.cached_es_presupuesto,
+                    inicio, fin
+                )
+                for inicio, fin in rangos
+            ]
+            for futuro in futuros:
+                for page_data in futuro.result():
+                    self._acumular_pagina(resultado, page_data)
+
+    def _acumular_pagina(self, resultado: Dict, page_data: Dict) -> None:
+        """Añade una página extraída a resultado y actualiza el resumen de layout"""
+        resultado['pages'].append(page_data)
+        resultado['all_lines'].extend(page_data['lines'])
+
+        # Actualizar resumen de layout
+        if page_data.get('layout'):
+            num_cols = page_data['layout'].get('num_columnas', 1)
+            if num_cols > 1:
+                resultado['layout_summary']['paginas_multicolumna'] += 1
+            resultado['layout_summary']['total_columnas'] = max(
+                resultado['layout_summary']['total_columnas'],
+                num_cols
+            )
+
+    def _filtrar_cabeceras_repetidas(self, lineas: List[str], filtrar_pies: bool = False):
         """
         Filtra líneas de cabecera que se repiten en múltiples páginas.
         Mantiene solo la primera aparición de cada patrón de cabecera.
 
         Args:
             lineas: Lista de líneas de texto extraídas
+            filtrar_pies: Si True, descarta también en esta misma pasada los pies de
+                página (equivale a aplicar después _filtrar_pies_pagina)
 
         Returns:
             Tupla (lista de líneas filtradas, título del proyecto o None)
         """
         # Detectar dinámicamente el nombre del proyecto en las primeras 10 líneas
         # Típicamente aparece después de "PRESUPUESTO" y antes de "CÓDIGO RESUMEN..."
-        patrones_dinamicos = list(self.header_patterns)
+        # set: pertenencia O(1) al comprobar cada línea del documento
+        patrones_dinamicos = set(self.header_patterns)
+        # tuple: startswith comprueba todos los prefijos en una sola llamada
+        prefijos_parciales = tuple(self.header_partial_patterns)
         titulo_proyecto = None  # Variable para guardar el título
 
-        import re
-
-        for i, linea in enumerate(lineas[:10]):
+        for i, linea in enumerate(islice(lineas, 10)):
             linea_limpia = linea.strip()
             # Si es una línea larga que parece nombre de proyecto (no es capítulo ni código de partida)
             # IMPORTANTE: Excluir líneas que empiezan con códigos de partida (letras+números)
             # Ejemplos de códigos: DEM06, U01AB100, E04SM090, CABLE16, GR0001, etc.
-            es_codigo_partida = bool(re.match(r'^[A-Z0-9]{2,}[\s\d]', linea_limpia))
+            es_codigo_partida = bool(_PATRON_CODIGO_PARTIDA.match(linea_limpia))
 
             if (len(linea_limpia) > 30 and
-                not linea_limpia.startswith(('CÓDIGO', 'PRESUPUESTO', 'CAPÍTULO', 'SUBCAPÍTULO',
-                                            '01', '02', '03', '04', '05', '06', '07', '08', '09',
-                                            '10', '11', '12', '13', '14', '15')) and
+                not _PATRON_NO_TITULO.match(linea_limpia) and
                 not es_codigo_partida):
                 # Verificar que no sea ya una cabecera conocida
                 if linea_limpia not in patrones_dinamicos:
@@ -280,7 +534,7 @@ class PDFExtractor:
                     if titulo_proyecto is None:  # Capturar solo el primer título detectado
                         titulo_proyecto = linea_limpia
                         logger.info(f"📋 Título del proyecto detectado: '{titulo_proyecto}'")
-                    patrones_dinamicos.append(linea_limpia)
+                    patrones_dinamicos.add(linea_limpia)
                     logger.debug(f"Detectado nombre de proyecto como cabecera: '{linea_limpia[:60]}...'")
 
         lineas_filtradas = []
@@ -289,6 +543,11 @@ class PDFExtractor:
         for linea in lineas:
             linea_limpia = linea.strip()
 
+            # Pies de página: se descartan siempre. Ninguna línea de paginación es TOTAL,
+            # y si coincide con una cabecera, todas sus repeticiones son también pie
+            if filtrar_pies and _PATRON_PIE_PAGINA.match(linea_limpia):
+                continue
+
             # IMPORTANTE: NUNCA filtrar líneas que contengan TOTAL (son datos importantes)
             if linea_limpia.upper().startswith('TOTAL'):
                 lineas_filtradas.append(linea)
@@ -296,7 +555,7 @@ class PDFExtractor:
 
             # IMPORTANTE: NUNCA filtrar líneas que parecen códigos de partidas
             # Códigos de partida típicos: DEM06, U01AB100, E04SM090, CABLE16, GR0001, etc.
-            es_codigo_partida = bool(re.match(r'^[A-Z0-9]{2,}[\s\d]', linea_limpia))
+            es_codigo_partida = bool(_PATRON_CODIGO_PARTIDA.match(linea_limpia))
             if es_codigo_partida:
                 lineas_filtradas.append(linea)
                 continue
@@ -306,21 +565,16 @@ class PDFExtractor:
             patron_coincidente = None
 
             # 1. Verificar coincidencia EXACTA con patrones dinámicos
-            for patron in patrones_dinamicos:
-                if linea_limpia == patron:
-                    es_cabecera = True
-                    patron_coincidente = patron
-                    break
+            if linea_limpia in patrones_dinamicos:
+                es_cabecera = True
+                patron_coincidente = linea_limpia
 
             # 2. Si no hubo coincidencia exacta, verificar patrones PARCIALES
             # Estos son cabeceras que pueden variar ligeramente
-            if not es_cabecera and hasattr(self, 'header_partial_patterns'):
-                for patron_parcial in self.header_partial_patterns:
-                    if linea_limpia.startswith(patron_parcial):
-                        es_cabecera = True
-                        patron_coincidente = linea_limpia  # Usar línea completa como patrón
-                        logger.debug(f"Cabecera parcial detectada: '{linea_limpia[:60]}' (patrón: '{patron_parcial}')")
-                        break
+            if not es_cabecera and linea_limpia.startswith(prefijos_parciales):
+                es_cabecera = True
+                patron_coincidente = linea_limpia  # Usar línea completa como patrón
+                logger.debug("Cabecera parcial detectada: '%.60s'", linea_limpia)
 
             # Si es cabecera, aplicar lógica de filtrado
             if es_cabecera:
@@ -369,42 +623,20 @@ class PDFExtractor:
         Returns:
             Lista de líneas con datos numéricos fusionados en las partidas correspondientes
         """
-        import re
-
-        # Patrón para detectar líneas con código de partida y unidad (sin números al final)
-        # Ej: "SYS UD SEGURIDAD Y SALUD", "GYR UD GESTIÓN DE RESIDUOS", "DEM06 m3 DEMOLICIÓN"
-        patron_partida_sin_numeros = re.compile(
-            r'^([A-Z][A-Z0-9]{1,19})\s+(m[2-3²³]?(?:/[a-z]+)?|ml|dm|cm|mm|km|m2|m3|dm2|dm3|cm2|cm3|ha|'
-            r'ud|u|pa|h|l|kg|t|tm|kw|kwh|mwh|ur|u20r|p:a|mes|día|año|sem|hora)\s+([A-ZÁÉÍÓÚÑ].+)$',
-            re.IGNORECASE
-        )
-
-        # Patrón para detectar líneas con solo 3 números (cantidad, precio, importe)
-        # Formato español: "0,30 15.000,00 4.500,00"
-        patron_tres_numeros = re.compile(
-            r'^\s*(\d+(?:\.\d{3})*,\d{1,4})\s+(\d+(?:\.\d{3})*,\d{1,4})\s+(\d+(?:\.\d{3})*,\d{1,2})\s*$'
-        )
-
-        # Patrón para detectar header de columnas numéricas
-        patron_header_numerico = re.compile(
-            r'^\s*CANTIDAD\s+PRECIO\s+IMPORTE\s*$',
-            re.IGNORECASE
-        )
-
         lineas_procesadas = []
-        partidas_pendientes = []  # Cola de partidas esperando datos numéricos
-        numeros_pendientes = []   # Cola de líneas de números encontradas
+        partidas_pendientes = deque()  # Cola de partidas esperando datos numéricos
+        numeros_pendientes = deque()   # Cola de líneas de números encontradas
 
         for i, linea in enumerate(lineas):
             linea_limpia = linea.strip()
 
             # 1. Si es un header de columnas numéricas, eliminarlo
-            if patron_header_numerico.match(linea_limpia):
+            if _PATRON_HEADER_NUMERICO.match(linea_limpia):
                 logger.debug(f"  🗑️  Eliminando header numérico: '{linea_limpia}'")
                 continue
 
             # 2. Si es una línea con solo 3 números, guardarla para fusionar
-            match_numeros = patron_tres_numeros.match(linea_limpia)
+            match_numeros = _PATRON_TRES_NUMEROS_SEPARADOS.match(linea_limpia)
             if match_numeros:
                 cantidad = match_numeros.group(1)
                 precio = match_numeros.group(2)
@@ -419,8 +651,11 @@ class PDFExtractor:
                 continue
 
             # 3. Si es una partida sin números, guardarla y marcar que espera datos
-            match_partida = patron_partida_sin_numeros.match(linea_limpia)
-            if match_partida:
+            match_partida = _PATRON_PARTIDA_SIN_NUMEROS.match(linea_limpia)
+            if match_partida and (
+                match_partida.group(2).lower() in _UNIDADES_PARTIDA
+                or _PATRON_UNIDAD_METRO_DIVISOR.fullmatch(match_partida.group(2))
+            ):
                 codigo = match_partida.group(1)
                 unidad = match_partida.group(2)
                 descripcion = match_partida.group(3)
@@ -433,7 +668,7 @@ class PDFExtractor:
                 # Verificar si hay números pendientes para fusionar
                 if numeros_pendientes:
                     # Tomar el primer conjunto de números pendientes
-                    datos = numeros_pendientes.pop(0)
+                    datos = numeros_pendientes.popleft()
                     linea_fusionada = f"{codigo} {unidad} {descripcion} {datos['cantidad']} {datos['precio']} {datos['importe']}"
                     lineas_procesadas.append(linea_fusionada)
                     logger.debug(f"  ✅ Fusionada: {codigo} con números {datos['cantidad']} {datos['precio']} {datos['importe']}")
@@ -453,8 +688,8 @@ class PDFExtractor:
 
             # 4. Procesar partidas pendientes si encontramos números antes de esta línea
             while partidas_pendientes and numeros_pendientes:
-                partida = partidas_pendientes.pop(0)
-                datos = numeros_pendientes.pop(0)
+                partida = partidas_pendientes.popleft()
+                datos = numeros_pendientes.popleft()
 
                 # Reemplazar la línea original con la versión fusionada
                 linea_fusionada = f"{partida['codigo']} {partida['unidad']} {partida['descripcion']} {datos['cantidad']} {datos['precio']} {datos['importe']}"
@@ -466,8 +701,8 @@ class PDFExtractor:
 
         # Al final, procesar cualquier partida o números pendientes
         while partidas_pendientes and numeros_pendientes:
-            partida = partidas_pendientes.pop(0)
-            datos = numeros_pendientes.pop(0)
+            partida = partidas_pendientes.popleft()
+            datos = numeros_pendientes.popleft()
 
             linea_fusionada = f"{partida['codigo']} {partida['unidad']} {partida['descripcion']} {datos['cantidad']} {datos['precio']} {datos['importe']}"
             lineas_procesadas[partida['indice']] = linea_fusionada
@@ -498,43 +733,9 @@ class PDFExtractor:
         Returns:
             Lista de líneas filtradas sin pies de página
         """
-        import re
-
-        # Patrones comunes de paginación en pies de página
-        patrones_paginacion = [
-            r'^\s*\d+\s*$',                    # Solo número: "23"
-            r'^\s*-\s*\d+\s*-\s*$',            # Con guiones: "- 23 -"
-            r'^\s*página\s+\d+\s*$',           # "Página 23" (case insensitive)
-            r'^\s*pág\.?\s+\d+\s*$',           # "Pág. 23" o "Pag 23"
-            r'^\s*page\s+\d+\s*$',             # "Page 23"
-            r'^\s*p\.\s*\d+\s*$',              # "P. 23"
-            r'^\s*\d+\s*/\s*\d+\s*$',          # "23 / 89" (página X de Y)
-            r'^\s*\[\s*\d+\s*\]\s*$',          # "[23]"
-            r'^\s*\d+\s+de\s+\w+\s+de\s+\d{4}\s+página\s+\d+\s*$',  # "8 de mayo de 2024 Página 1"
-            r'^\s*\d+\s+de\s+\w+\s+de\s+\d{4}\s*$',  # "8 de mayo de 2024" (fecha sola)
-        ]
-
-        # Compilar patrones (case insensitive)
-        patrones_compilados = [re.compile(p, re.IGNORECASE) for p in patrones_paginacion]
-
-        lineas_filtradas = []
-
-        for linea in lineas:
-            linea_limpia = linea.strip()
-
-            # Verificar si coincide con algún patrón de paginación
-            es_pie_pagina = False
-            for patron in patrones_compilados:
-                if patron.match(linea_limpia):
-                    es_pie_pagina = True
-                    logger.debug(f"Pie de página detectado y eliminado: '{linea_limpia}'")
-                    break
-
-            # Solo añadir la línea si NO es pie de página
-            if not es_pie_pagina:
-                lineas_filtradas.append(linea)
-
-        return lineas_filtradas
+        # Una sola búsqueda por línea; el total eliminado lo registra extraer_todo
+        es_pie = _PATRON_PIE_PAGINA.match
+        return [linea for linea in lineas if not es_pie(linea.strip())]
 
     def _reordenar_totales_partida_tras_salto_pagina(self, lineas: List[str]) -> List[str]:
         """
@@ -564,26 +765,6 @@ class PDFExtractor:
         Returns:
             Lista de líneas reordenadas
         """
-        import re
-
-        # Patrón para línea TOTAL CAPÍTULO/SUBCAPÍTULO sin importe
-        patron_total_sin_importe = re.compile(
-            r'^TOTAL\s+(SUBCAPÍTULO|CAPÍTULO|APARTADO)\s+([A-Z]?\d{1,2}(?:\.\d{1,2})*)\s+',
-            re.IGNORECASE
-        )
-
-        # Patrón para línea con solo 3 números (totales de partida: cantidad, precio, importe)
-        patron_tres_numeros = re.compile(
-            r'^\s*(\d{1,3}(?:\.\d{3})*,\d{1,4})\s+(\d{1,3}(?:\.\d{3})*,\d{1,4})\s+(\d{1,3}(?:\.\d{3})*,\d{1,4})\s*$'
-        )
-
-        # Patrón para líneas que son basura (cabeceras fragmentadas)
-        patron_basura = re.compile(
-            r'^(ANCHURA|ALTURA|PARCIALES|CANTIDAD|PRECIO|IMPORTE|UDS|LONGITUD|CÓDIGO|RESUMEN|'
-            r'PRESUPUESTO|CÓDIGO\s+RESUMEN)',
-            re.IGNORECASE
-        )
-
         lineas_procesadas = []
         i = 0
 
@@ -591,7 +772,7 @@ class PDFExtractor:
             linea = lineas[i].strip()
 
             # Buscar línea TOTAL sin importe al final
-            if patron_total_sin_importe.match(linea) and not re.search(r'\d{1,3}(?:\.\d{3})*,\d{2}\s*$', linea):
+            if _PATRON_REORDEN_TOTAL.match(linea) and not _PATRON_IMPORTE_FINAL.search(linea):
                 # Encontramos un TOTAL sin importe, buscar si hay totales de partida después
                 posicion_total = i
                 totales_partida_linea = None
@@ -602,18 +783,18 @@ class PDFExtractor:
                     linea_siguiente = lineas[j].strip()
 
                     # Saltar líneas vacías y basura
-                    if not linea_siguiente or patron_basura.match(linea_siguiente):
+                    if not linea_siguiente or _PATRON_REORDEN_BASURA.match(linea_siguiente):
                         continue
 
                     # ¿Es línea con 3 números (totales de partida)?
-                    if patron_tres_numeros.match(linea_siguiente):
+                    if _PATRON_REORDEN_TRES_NUMEROS.match(linea_siguiente):
                         totales_partida_linea = linea_siguiente
                         totales_partida_idx = j
                         logger.info(f"🔄 Detectados totales de partida desplazados: '{totales_partida_linea}' (posición {j})")
                         break
 
                     # Si encontramos línea con puntos + importe, es el importe del TOTAL, no buscar más
-                    if re.match(r'^\.{10,}', linea_siguiente):
+                    if _PATRON_PUNTOS.match(linea_siguiente):
                         break
 
                 # Si encontramos totales de partida desplazados, reordenar
@@ -661,45 +842,6 @@ class PDFExtractor:
         Returns:
             Lista de líneas con TOTALES fusionados
         """
-        import re
-
-        # Patrón para línea TOTAL sin importe al final
-        # Ejemplo: "TOTAL CAPÍTULO 02 CIMENTACIONES..................."
-        patron_total_sin_importe = re.compile(
-            r'^TOTAL\s+(SUBCAPÍTULO|CAPÍTULO|APARTADO)?\s*([A-Z]?\d{1,2}(?:\.\d{1,2})*)\s+([A-ZÁÉÍÓÚÑ][^0-9]*?)\.{3,}\s*$',
-            re.IGNORECASE
-        )
-
-        # Patrón alternativo: TOTAL sin tipo pero con código
-        # Ejemplo: "TOTAL 02 CIMENTACIONES..................."
-        patron_total_simple_sin_importe = re.compile(
-            r'^TOTAL\s+(\d{1,2}(?:\.\d{1,2})*)\s+([A-ZÁÉÍÓÚÑ][^0-9]*?)\.{3,}\s*$',
-            re.IGNORECASE
-        )
-
-        # Patrón para línea con puntos suspensivos + importe
-        # Ejemplo: "............................................................................................... 12.050,55"
-        patron_puntos_importe = re.compile(
-            r'^\.{10,}\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-        )
-
-        # Patrón para líneas que son basura (cabeceras fragmentadas, números sueltos, paginación)
-        # Estas líneas se saltan al buscar el importe de un TOTAL fragmentado
-        patron_basura = re.compile(
-            r'^(ANCHURA|ALTURA|PARCIALES|CANTIDAD|PRECIO|IMPORTE|UDS|LONGITUD|CÓDIGO|RESUMEN|'
-            r'PRESUPUESTO\s+Y\s+MEDICIONES|PRESUPUESTO|'  # Cabeceras de página
-            r'Página\s+\d+|Pág\.?\s+\d+|'  # Paginación
-            r'\d+,\d+\s+\d+,\d+\s+\d+,\d+|'  # Tres números separados (mediciones)
-            r'[\d.,\s]+)$',  # Solo números y separadores
-            re.IGNORECASE
-        )
-
-        # Patrón adicional para líneas que empiezan con palabras de cabecera
-        patron_cabecera_fragmentada = re.compile(
-            r'^(CÓDIGO\s+RESUMEN|ANCHURA\s+ALTURA|UDS\s+LONGITUD)',
-            re.IGNORECASE
-        )
-
         lineas_procesadas = []
         i = 0
 
@@ -707,9 +849,9 @@ class PDFExtractor:
             linea = lineas[i].strip()
 
             # Verificar si es una línea TOTAL sin importe
-            match_total = patron_total_sin_importe.match(linea)
+            match_total = _PATRON_TOTAL_SIN_IMPORTE.match(linea)
             if not match_total:
-                match_total = patron_total_simple_sin_importe.match(linea)
+                match_total = _PATRON_TOTAL_SIMPLE_SIN_IMPORTE.match(linea)
 
             if match_total:
                 # Buscar el importe en las siguientes líneas
@@ -720,21 +862,21 @@ class PDFExtractor:
                     linea_siguiente = lineas[j].strip()
 
                     # ¿Es línea con puntos + importe?
-                    match_importe = patron_puntos_importe.match(linea_siguiente)
+                    match_importe = _PATRON_PUNTOS_IMPORTE.match(linea_siguiente)
                     if match_importe:
                         importe_encontrado = match_importe.group(1)
                         lineas_a_saltar = j - i
                         break
 
                     # ¿Es basura que debemos saltar?
-                    if (patron_basura.match(linea_siguiente) or
-                        patron_cabecera_fragmentada.match(linea_siguiente) or
+                    if (_PATRON_TOTAL_BASURA.match(linea_siguiente) or
+                        _PATRON_CABECERA_FRAGMENTADA.match(linea_siguiente) or
                         not linea_siguiente):
                         continue
 
                     # Si encontramos otra línea significativa (no basura), dejamos de buscar
                     # para evitar fusiones incorrectas
-                    if linea_siguiente.startswith('TOTAL') or re.match(r'^\d{1,2}(?:\.\d{1,2})*\s+', linea_siguiente):
+                    if linea_siguiente.startswith('TOTAL') or _PATRON_CODIGO_CAPITULO_INICIO.match(linea_siguiente):
                         break
 
                 if importe_encontrado:
@@ -810,8 +952,8 @@ class PDFExtractor:
                     'layout': {'num_columnas': 0, 'tipo': 'vacio'}
                 }
 
-            # Analizar layout de la página
-            layout_info = self.column_detector.analizar_layout(words)
+            # Analizar layout de la página (coordenadas como arrays, leídas una vez)
+            layout_info = self.column_detector.analizar_layout(palabras_soa(words))
             num_columnas = layout_info.get('num_columnas', 1)
 
             # VALIDACIÓN ESPECIAL: Detectar si es una página de presupuesto con tabla (no multicolumna real)
@@ -901,6 +1043,59 @@ class PDFExtractor:
                 'layout': layout_info
             }
 
+    def _extraer_pagina_pymupdf(self, page, num_pagina: int) -> Dict:
+        """
+        Extrae una página con PyMuPDF
+
+        PyMuPDF devuelve palabras con coordenadas; las líneas se reconstruyen con
+        ColumnDetector (por posición Y y, si hay varias columnas, columna a columna).
+        Como en _extraer_pagina, el layout de la página 1 se aplica a todo el documento.
+
+        Args:
+            page: objeto página de PyMuPDF
+            num_pagina: número de página
+
+        Returns:
+            dict con texto, líneas y layout de la página
+        """
+        # (x0, y0, x1, y1, texto, bloque, línea, palabra) → formato de palabra de pdfplumber
+        words = [
+            {'x0': w[0], 'top': w[1], 'x1': w[2], 'bottom': w[3], 'text': w[4]}
+            for w in page.get_text("words")
+        ]
+
+        if not words:
+            return {
+                'num': num_pagina,
+                'text': '',
+                'lines': [],
+                'layout': {'num_columnas': 0, 'tipo': 'vacio'}
+            }
+
+        detector = self.column_detector or ColumnDetector()
+
+        layout_info = None
+        if self.column_detector:
+            if self.cached_num_columnas is None:
+                layout_info = self.column_detector.analizar_layout(palabras_soa(words))
+                self.cached_num_columnas = layout_info.get('num_columnas', 1)
+                self.cached_es_presupuesto = False
+                logger.info(f"  Página {num_pagina}: Layout detectado y cacheado → columnas={self.cached_num_columnas}")
+            else:
+                layout_info = {'num_columnas': self.cached_num_columnas, 'tipo': 'cached'}
+
+        if layout_info and layout_info['num_columnas'] > 1:
+            lineas = detector.extraer_por_columnas(words)
+        else:
+            lineas = detector.agrupar_lineas(words)
+
+        return {
+            'num': num_pagina,
+            'text': '\n'.join(lineas),
+            'lines': lineas,
+            'layout': layout_info
+        }
+
     def extraer_lineas(self) -> List[str]:
         """
         Extrae solo las líneas de texto del PDF
@@ -989,6 +1184,52 @@ class PDFExtractor:
         logger.info(f"✓ Texto guardado en {output_path}")
 
 
+def _motor_configurado() -> str:
+    """Motor de extracción por defecto: settings.PDF_MOTOR, o pdfplumber fuera de la app"""
+    try:
+        from config import settings
+    except ImportError:
+        return PDFExtractor.MOTOR_PDFPLUMBER
+    return settings.PDF_MOTOR.lower()
+
+
+def _extraer_rango_paginas(pdf_path: str, user_id: int, proyecto_id: int,
+                           detect_columns: bool, motor: str,
+                           cached_num_columnas: Optional[int], cached_es_presupuesto: Optional[bool],
+                           inicio: int, fin: int) -> List[Dict]:
+    """
+    Extrae las páginas inicio..fin (1-based, inclusive) en un proceso del pool
+
+    Los objetos página de pdfplumber/PyMuPDF no se pueden serializar: cada proceso
+    abre el PDF por su cuenta y recibe el layout ya detectado en la página 1.
+    """
+    extractor = PDFExtractor(pdf_path, user_id, proyecto_id, detect_columns=detect_columns, motor=motor)
+    extractor.cached_num_columnas = cached_num_columnas
+    extractor.cached_es_presupuesto = cached_es_presupuesto
+
+    with extractor._abrir_documento() as (paginas, _):
+        return [extractor._extraer_pagina_motor(paginas[i - 1], i) for i in range(inicio, fin + 1)]
+
+
+@lru_cache(maxsize=_MAX_CACHES_EN_MEMORIA)
+def _leer_cache_texto(ruta_cache: str, mtime_ns: int) -> tuple:
+    """
+    Lee un archivo de caché de texto extraído y lo parte en líneas
+
+    mtime_ns solo forma parte de la clave del LRU: si el archivo se reescribe,
+    la entrada anterior deja de usarse.
+
+    Returns:
+        tuple con las líneas (inmutable: la entrada se comparte entre llamadas)
+    """
+    # Una sola lectura; all_text no se conserva (se reconstruye si alguien lo pide)
+    with open(ruta_cache, 'r', encoding='utf-8') as f:
+        texto = f.read()
+    if texto.endswith('\n'):
+        texto = texto[:-1]
+    return tuple(texto.split('\n')) if texto else ()
+
+
 def extraer_pdf(pdf_path: str, output_txt: Optional[str] = None) -> Dict:
     """
     Función helper para extraer rápidamente un PDF
@@ -5,12 +5,8 @@ Actualizado para usar PDFOrchestrator (parser_v2)
 
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import Dict, Any
+from typing import Dict, Any, List, Set
 import logging
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent))
 
 from database.manager import DatabaseManager
 from parsers.orchestrator import PDFOrchestrator
@@ -368,16 +364,18 @@ class ProcesamientoService:
         # Mapa para tracking de nodos creados
         codigo_a_nodo_id = {}
 
-        # Procesar cada capítulo (sin partidas, solo estructura)
+        # Procesar cada capítulo (sin partidas, solo estructura) en una
+        # única transacción: flush por fila, un solo commit al final
         capitulos = estructura.get('capitulos', [])
-        for capitulo in capitulos:
-            self._procesar_capitulo_fase1(
-                proyecto_id=proyecto_id,
-                capitulo_data=capitulo,
-                padre_id=nodo_raiz.id,
-                codigo_a_nodo_id=codigo_a_nodo_id,
-                nivel=1
-            )
+        with self.manager.transaccion():
+            for capitulo in capitulos:
+                self._procesar_capitulo_fase1(
+                    proyecto_id=proyecto_id,
+                    capitulo_data=capitulo,
+                    padre_id=nodo_raiz.id,
+                    codigo_a_nodo_id=codigo_a_nodo_id,
+                    nivel=1
+                )
 
         logger.info(f"✓ Fase 1 guardada: {len(capitulos)} capítulos con sus subcapítulos")
 
@@ -481,17 +479,33 @@ class ProcesamientoService:
         )
         codigo_a_nodo_id = {row[1]: row[0] for row in result}
 
-        # Procesar cada capítulo para extraer partidas
+        # Conceptos ya existentes (una sola consulta en lugar de una por partida)
+        result = self.db.execute(
+            text("SELECT codigo FROM appmediciones.conceptos WHERE proyecto_id = :pid"),
+            {'pid': proyecto_id}
+        )
+        codigos_existentes = {row[0] for row in result}
+
+        # Acumular filas y volcarlas en bloque al final
+        conceptos_nuevos = []
+        nodos_nuevos = []
+
         capitulos = estructura.get('capitulos', [])
         total_partidas = 0
 
         for capitulo in capitulos:
             total_partidas += self._procesar_partidas_fase2(
-                proyecto_id=proyecto_id,
                 capitulo_data=capitulo,
-                codigo_a_nodo_id=codigo_a_nodo_id
+                codigo_a_nodo_id=codigo_a_nodo_id,
+                codigos_existentes=codigos_existentes,
+                conceptos_nuevos=conceptos_nuevos,
+                nodos_nuevos=nodos_nuevos
             )
 
+        with self.manager.transaccion():
+            self.manager.crear_conceptos_bulk(proyecto_id, conceptos_nuevos)
+            self.manager.crear_nodos_bulk(proyecto_id, nodos_nuevos)
+
         # Actualizar totales de partidas sumando todos los nodos
         self._actualizar_totales_partidas(proyecto_id)
 
@@ -499,17 +513,24 @@ class ProcesamientoService:
 
     def _procesar_partidas_fase2(
         self,
-        proyecto_id: int,
         capitulo_data: Dict[str, Any],
-        codigo_a_nodo_id: Dict[str, int]
+        codigo_a_nodo_id: Dict[str, int],
+        codigos_existentes: Set[str],
+        conceptos_nuevos: List[Dict[str, Any]],
+        nodos_nuevos: List[Dict[str, Any]]
     ) -> int:
         """
         Procesa las partidas de un capítulo recursivamente (Fase 2).
 
+        No escribe en BD: acumula las filas de conceptos y nodos para
+        insertarlas en bloque desde _guardar_fase2_en_bd.
+
         Args:
-            proyecto_id: ID del proyecto
             capitulo_data: Datos del capítulo/subcapítulo
-            codigo_a_nodo_id: Mapa de códigos a IDs de nodos
+            codigo_a_nodo_id: Mapa de códigos a IDs de nodos (capítulos)
+            codigos_existentes: Códigos de concepto ya presentes o acumulados
+            conceptos_nuevos: Filas de conceptos a crear
+            nodos_nuevos: Filas de nodos a crear
 
         Returns:
             Número de partidas guardadas
@@ -533,46 +554,39 @@ class ProcesamientoService:
         for partida in capitulo_data.get('partidas', []):
             codigo = partida.get('codigo')
             resumen = partida.get('resumen', '')
-            unidad = partida.get('unidad', '')
-            cantidad = partida.get('cantidad', 0.0)
-            precio = partida.get('precio', 0.0)
-            importe = partida.get('importe', 0.0)
-
-            # Crear concepto de partida si no existe
-            concepto_existente = self.manager.obtener_concepto(proyecto_id, codigo)
-            if not concepto_existente:
-                self.manager.crear_concepto(
-                    proyecto_id=proyecto_id,
-                    codigo=codigo,
-                    tipo=TipoConcepto.PARTIDA,
-                    nombre=resumen,
-                    resumen=resumen,
-                    descripcion=partida.get('descripcion', ''),
-                    unidad=unidad,
-                    precio=precio,
-                    cantidad_total=0,  # Se calculará después sumando todos los nodos
-                    importe_total=0    # Se calculará después
-                )
 
-            # Crear nodo de partida
-            nodo = self.manager.crear_nodo(
-                proyecto_id=proyecto_id,
-                codigo_concepto=codigo,
-                padre_id=padre_id,
-                nivel=capitulo_data.get('nivel', 1) + 1,
-                orden=partida.get('orden', 0),
-                cantidad=cantidad
-            )
-
-            codigo_a_nodo_id[codigo] = nodo.id
+            # Concepto de partida si no existe (una vez por código)
+            if codigo not in codigos_existentes:
+                codigos_existentes.add(codigo)
+                conceptos_nuevos.append({
+                    'codigo': codigo,
+                    'tipo': TipoConcepto.PARTIDA,
+                    'nombre': resumen,
+                    'resumen': resumen,
+                    'descripcion': partida.get('descripcion', ''),
+                    'unidad': partida.get('unidad', ''),
+                    'precio': partida.get('precio', 0.0),
+                    'cantidad_total': 0,  # Se calculará después sumando todos los nodos
+                    'importe_total': 0    # Se calculará después
+                })
+
+            # Nodo de partida
+            nodos_nuevos.append({
+                'codigo_concepto': codigo,
+                'padre_id': padre_id,
+                'orden': partida.get('orden', 0),
+                'cantidad': partida.get('cantidad', 0.0)
+            })
             total_partidas += 1
 
         # Procesar subcapítulos recursivamente
         for subcapitulo in capitulo_data.get('subcapitulos', []):
             total_partidas += self._procesar_partidas_fase2(
-                proyecto_id=proyecto_id,
                 capitulo_data=subcapitulo,
-                codigo_a_nodo_id=codigo_a_nodo_id
+                codigo_a_nodo_id=codigo_a_nodo_id,
+                codigos_existentes=codigos_existentes,
+                conceptos_nuevos=conceptos_nuevos,
+                nodos_nuevos=nodos_nuevos
             )
 
         return total_partidas
@@ -614,15 +628,16 @@ class ProcesamientoService:
         # Mapa para tracking de nodos creados
         codigo_a_nodo_id = {}
 
-        # Procesar cada capítulo
-        for capitulo in capitulos:
-            self._procesar_capitulo_recursivo(
-                proyecto_id=proyecto_id,
-                capitulo_data=capitulo,
-                padre_id=nodo_raiz.id,
-                codigo_a_nodo_id=codigo_a_nodo_id,
-                nivel=1
-            )
+        # Procesar cada capítulo (una única transacción)
+        with self.manager.transaccion():
+            for capitulo in capitulos:
+                self._procesar_capitulo_recursivo(
+                    proyecto_id=proyecto_id,
+                    capitulo_data=capitulo,
+                    padre_id=nodo_raiz.id,
+                    codigo_a_nodo_id=codigo_a_nodo_id,
+                    nivel=1
+                )
 
         # Actualizar totales de partidas sumando todos los nodos
         self._actualizar_totales_partidas(proyecto_id)
@@ -5,11 +5,8 @@ Proyecto Service - Lógica de negocio para proyectos
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import logging
-import sys
 from pathlib import Path
 
-sys.path.append(str(Path(__file__).parent.parent))
-
 from database.manager import DatabaseManager
 from models import Proyecto
 
@@ -77,7 +74,9 @@ class ProyectoService:
         arbol = self.manager.construir_arbol_jerarquico(proyecto_id)
 
         # Obtener estadísticas
-        estadisticas = self.manager.queries.obtener_estadisticas_proyecto(proyecto_id)
+        estadisticas = self.manager.queries.obtener_estadisticas_proyecto(
+            proyecto_id, version=proyecto.fecha_actualizacion
+        )
 
         return {
             'proyecto': proyecto,
@@ -3,10 +3,7 @@ Logging utilities
 """
 
 import logging
-from pathlib import Path
-import sys
 
-sys.path.append(str(Path(__file__).parent.parent))
 from config import settings
 
 